@@ -1,14 +1,36 @@
 import os
 import io
+import re
+import csv
+import shutil
+import json
+import base64
+import hashlib
 import traceback
 import sqlite3
+import time
+import tempfile
+import threading
+import queue
+import bisect
+import itertools
+import click
 import pandas as pd
 import requests
 from flask import Flask, jsonify, render_template, request, redirect, url_for, session, send_from_directory
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from flask_cors import CORS
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from form_validation import get_form_validator
+from application_storage import DOCUMENT_COLUMN, json_path, document_sql, generated_column_definition, get_storage_layout
+from resume_storage import UploadRejected, adopt_reference, store_upload, sweep_orphans
+from connection_pool import get_connection, pool_stats
+from conditional_responses import CachedBody, conditional_response, revalidate
+from application_rollups import (ROLLUP_DIMENSIONS, COHORT_DIMENSIONS, FUNNEL_COHORT_ALL, normalize_email, get_metadata_counter,
+                                 bump_metadata_counter, bump_data_generation, bump_rollup, record_application_rollups,
+                                 record_status_rollups, record_pipeline_entries)
 
 # --- App Initialization ---
 app = Flask(__name__)
@@ -19,7 +41,9 @@ app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'a-very-secure-and-random-de
 
 # --- Constants & Configuration ---
 DATABASE = 'recruitment_final.db'
-UPLOAD_FOLDER = 'uploads'
+# The form server can store resumes in this folder too and hand them over by reference (see resume_storage.py)
+UPLOAD_FOLDER = os.environ.get('SHARED_UPLOAD_FOLDER', 'uploads')
+UPLOAD_HANDOFF_KEY = os.environ.get('UPLOAD_HANDOFF_KEY')
 ALLOWED_EXTENSIONS = {'pdf'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
@@ -28,6 +52,135 @@ DEFAULT_ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', '12345')
 # Core fields that are essential and cannot be deleted by the admin
 CORE_FIELDS = ['id', 'name', 'email', 'submission_timestamp', 'resume_path']
 
+# Fields seeded into an empty form_config; based on the original recruitment-form.html
+DEFAULT_FIELDS = [
+    # Personal Details
+    {'name': 'name', 'label': 'Full Name', 'type': 'text', 'subsection': 'Personal Details', 'required': 1, 'is_core': 1},
+    {'name': 'email', 'label': 'Email Address', 'type': 'email', 'subsection': 'Personal Details', 'required': 1, 'is_core': 1},
+    {'name': 'dob', 'label': 'Date of Birth', 'type': 'date', 'subsection': 'Personal Details', 'required': 1},
+    {'name': 'place_of_birth', 'label': 'Place of Birth', 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
+    {'name': 'gender', 'label': 'Gender', 'type': 'select', 'options': 'Male, Female, Other', 'subsection': 'Personal Details', 'required': 0},
+    {'name': 'nationality', 'label': 'Nationality', 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
+    {'name': 'father_name', 'label': "Father's Name", 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
+    {'name': 'blood_group', 'label': 'Blood Group', 'type': 'select', 'options': 'A+, A-, B+, B-, AB+, AB-, O+, O-', 'subsection': 'Personal Details', 'required': 0},
+    {'name': 'pan_card', 'label': 'PAN Card Number', 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
+    {'name': 'marital_status', 'label': 'Marital Status', 'type': 'select', 'options': 'Single, Married, Divorced, Widowed', 'subsection': 'Personal Details', 'required': 0},
+    
+    # Spouse's Details
+    {'name': 'spouse_name', 'label': "Spouse's Name", 'type': 'text', 'subsection': "Spouse's Details", 'required': 0},
+    {'name': 'spouse_employment', 'label': "Spouse's Employment Status", 'type': 'text', 'subsection': "Spouse's Details", 'required': 0},
+    {'name': 'spouse_work_details', 'label': 'Spouse Work Details', 'type': 'textarea', 'subsection': "Spouse's Details", 'required': 0},
+    {'name': 'children_count', 'label': 'Number of Children', 'type': 'number', 'subsection': "Spouse's Details", 'required': 0},
+
+    # Contact & Position
+    {'name': 'mobile_number', 'label': 'Mobile Number', 'type': 'tel', 'subsection': 'Contact & Position', 'required': 1},
+    {'name': 'business_entity', 'label': 'Business Entity', 'type': 'select', 'options': 'SIL, ZIL, ZMSL, ZIIL', 'subsection': 'Contact & Position', 'required': 0},
+    {'name': 'post_applying_for', 'label': 'Post Applying For', 'type': 'select', 'options': 'Intern, Civil Engineer, Graduate Engineer Trainee, Software Developer Trainee, Data Analyst Trainee, Business Development Executive, Human Resources Trainee, Marketing Trainee', 'subsection': 'Contact & Position', 'required': 0},
+    {'name': 'location_of_position', 'label': 'Location of Position', 'type': 'select', 'options': 'Gurugram, Pune, Bangalore', 'subsection': 'Contact & Position', 'required': 0},
+    {'name': 'present_address', 'label': 'Present Address', 'type': 'textarea', 'subsection': 'Contact & Position', 'required': 1},
+    {'name': 'permanent_address', 'label': 'Permanent Address', 'type': 'textarea', 'subsection': 'Contact & Position', 'required': 0},
+    {'name': 'hobbies', 'label': 'Hobbies / Leisure Activities', 'type': 'text', 'subsection': 'Contact & Position', 'required': 0},
+
+    # Academic Qualifications
+    {'name': 'qualification_10th_school', 'label': '10th School/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_10th_board', 'label': '10th Board', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_10th_subjects', 'label': '10th Main Subjects', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_10th_year', 'label': '10th Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_10th_marks', 'label': '10th % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_10th_division', 'label': '10th Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    
+    {'name': 'qualification_12th_school', 'label': '12th School/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_12th_board', 'label': '12th Board/University', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_12th_specialization', 'label': '12th Course Specialization', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_12th_year', 'label': '12th Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_12th_marks', 'label': '12th % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_12th_division', 'label': '12th Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+
+    {'name': 'qualification_grad_school', 'label': 'Graduation Institute/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_grad_course', 'label': 'Graduation Course', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_grad_specialization', 'label': 'Graduation Course Specialization', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_grad_year', 'label': 'Graduation Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_grad_marks', 'label': 'Graduation % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_grad_division', 'label': 'Graduation Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+
+    {'name': 'qualification_pg_school', 'label': 'Post-Graduation Institute/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_pg_course', 'label': 'Post-Graduation Course', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_pg_specialization', 'label': 'Post-Graduation Course Specialization', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_pg_year', 'label': 'Post-Graduation Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_pg_marks', 'label': 'Post-Graduation % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+    {'name': 'qualification_pg_division', 'label': 'Post-Graduation Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
+
+    # Additional Information
+    {'name': 'previously_applied', 'label': 'Have you applied with us earlier?', 'type': 'radio', 'options': 'Yes, No', 'subsection': 'Additional Information', 'required': 0},
+    {'name': 'related_employee', 'label': 'Are you related to any employee?', 'type': 'radio', 'options': 'Yes, No', 'subsection': 'Additional Information', 'required': 0},
+    {'name': 'related_employee_details', 'label': 'If yes, provide details', 'type': 'textarea', 'subsection': 'Additional Information', 'required': 0},
+    {'name': 'legal_cases', 'label': 'Are there any criminal/civil cases against you?', 'type': 'radio', 'options': 'Yes, No', 'subsection': 'Additional Information', 'required': 0},
+    {'name': 'legal_cases_details', 'label': 'If yes, provide details', 'type': 'textarea', 'subsection': 'Additional Information', 'required': 0},
+]
+
+# Dashboard filter parameters and the applications column each one matches on
+FILTER_COLUMNS = {
+    'location': 'location_of_position', 'post': 'post_applying_for',
+    'qualification': 'qualification_grad_course', 'business_entity': 'business_entity',
+    'course': 'qualification_grad_course', 'college': 'qualification_grad_school'
+}
+# Columns scanned by the free-text search box above the responses table
+SEARCH_COLUMNS = ['name', 'email', 'mobile_number', 'post_applying_for', 'location_of_position', 'qualification_grad_school', 'qualification_grad_course']
+DEFAULT_TABLE_COLUMNS = ['name', 'email', 'post_applying_for', 'qualification_grad_school', 'Status', 'resume_path']
+TABLE_PAGE_SIZE = 50
+TABLE_MAX_PAGE_SIZE = 500
+# Columns the dashboard filters on; each gets a secondary index on applications
+INDEXED_COLUMNS = ['submission_timestamp', 'location_of_position', 'post_applying_for', 'business_entity', 'qualification_grad_school', 'qualification_grad_course']
+# Bookkeeping columns on applications that are never shown as form answers
+INTERNAL_COLUMNS = ['email_normalized']
+# Layout of a newly created applications table: 'columns' (one column per field) or 'document'
+# (answers in one JSON column); existing databases are converted with `flask convert-storage`
+APPLICATION_STORAGE = os.environ.get('APPLICATION_STORAGE', 'columns')
+# Form fields that stay real (generated, indexed) columns in document storage: everything the dashboard filters or counts on
+PROMOTED_COLUMNS = [col for col in dict.fromkeys(INDEXED_COLUMNS + ROLLUP_DIMENSIONS) if col not in CORE_FIELDS]
+# Dashboard column roles shared by the KPI, chart and facet builders
+DASHBOARD_COLUMNS = {
+    'STATUS': 'Status', 'GENDER': 'gender', 'DATE': 'submission_timestamp', 'NAME': 'name',
+    'COMPANY': 'business_entity', 'COLLEGE': 'qualification_grad_school',
+    'LOCATION': 'location_of_position', 'POST': 'post_applying_for',
+    'QUALIFICATION': 'qualification_grad_course', 'COURSE': 'qualification_grad_course'
+}
+# Dashboard charts and the column each one counts (the funnel is built from the status KPIs)
+CHART_DIMENSIONS = {
+    'apps_per_company': DASHBOARD_COLUMNS['COMPANY'], 'apps_per_college': DASHBOARD_COLUMNS['COLLEGE'],
+    'gender_diversity': DASHBOARD_COLUMNS['GENDER'], 'recruitment_funnel': None
+}
+# Filter dropdowns and the column their options come from
+FACET_COLUMNS = {
+    'locations': DASHBOARD_COLUMNS['LOCATION'], 'posts': DASHBOARD_COLUMNS['POST'],
+    'qualifications': DASHBOARD_COLUMNS['QUALIFICATION'], 'business_entities': DASHBOARD_COLUMNS['COMPANY'],
+    'courses': DASHBOARD_COLUMNS['COURSE'], 'colleges': DASHBOARD_COLUMNS['COLLEGE']
+}
+# Pipeline stages in funnel order; any other status (e.g. Rejected) takes an applicant out of the funnel
+FUNNEL_STAGES = ['Applied', 'Shortlisted', 'Interviewed', 'Offered', 'Hired']
+# Upper bounds, in hours, of the time-in-stage histogram buckets; the last bucket is open-ended
+STAGE_DURATION_BUCKETS = [1, 2, 4, 8, 12, 24, 48, 72, 96, 120, 168, 240, 336, 504, 720, 1440, 2160]
+# Facet values returned per dropdown when the request does not pass `limit` (0 returns every value)
+FACET_DEFAULT_LIMIT = 50
+# Maximum number of serialized dashboard responses kept in the in-process cache
+DATA_CACHE_SIZE = int(os.environ.get('DATA_CACHE_SIZE', 256))
+# How long browsers and proxies may reuse the active public form config; a versioned URL never changes and is cached for a year
+FORM_CONFIG_MAX_AGE = 60
+# Rows the background compaction copies per transaction, and its pause between chunks so submissions get the write lock
+COMPACTION_CHUNK_SIZE = 2000
+COMPACTION_PAUSE_SECONDS = 0.05
+# How often stored resumes that no application references are deleted, and how long one must go unused first; the
+# grace period covers submissions still being saved, including those queued in the form server's outbox
+RESUME_SWEEP_INTERVAL_SECONDS = int(os.environ.get('RESUME_SWEEP_INTERVAL_SECONDS', 6 * 3600))
+RESUME_SWEEP_GRACE_SECONDS = int(os.environ.get('RESUME_SWEEP_GRACE_SECONDS', 24 * 3600))
+# Rows fetched from SQLite per batch when exporting, which bounds export memory
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
@@ -38,10 +191,147 @@ def allowed_file(filename):
 # --- Database Management ---
 
 def get_db_conn():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Returns a pooled connection to the SQLite database; close() hands it back to the pool."""
+    return get_connection(DATABASE)
+
+def get_hidden_columns(cursor):
+    """Columns of deleted fields that stay in applications until the background compaction drops them."""
+    return {row[0] for row in cursor.execute("SELECT name FROM hidden_columns").fetchall()}
+
+def ensure_application_indexes(cursor):
+    """Creates the filter and email indexes on applications for every indexed column that currently exists."""
+    layout = get_storage_layout(cursor)
+    hidden = get_hidden_columns(cursor)
+    for col in INDEXED_COLUMNS:
+        if layout.has_column(col) and col not in hidden:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_applications_{col} ON applications("{col}")')
+    if layout.has_column('email_normalized'):
+        ensure_unique_email_index(cursor)
+
+def ensure_unique_email_index(cursor):
+    """
+    Makes the normalized email unique, so submissions, the outbox fallback and imports all reject an
+    address that differs from a registered one only in case or surrounding spaces.
+    """
+    index = cursor.execute("SELECT \"unique\" FROM pragma_index_list('applications') WHERE name = 'idx_applications_email_normalized'").fetchone()
+    if index is not None and index[0]:
+        return
+    if index is not None:
+        cursor.execute("DROP INDEX idx_applications_email_normalized")  # Plain index from before emails were deduplicated on it
+    try:
+        cursor.execute("CREATE UNIQUE INDEX idx_applications_email_normalized ON applications(email_normalized)")
+    except sqlite3.IntegrityError:
+        duplicates = cursor.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM applications WHERE email_normalized IS NOT NULL GROUP BY email_normalized HAVING COUNT(*) > 1)").fetchone()[0]
+        print(f"Warning: {duplicates} email(s) have more than one application differing only in case; "
+              "the normalized email stays non-unique until they are merged.")
+        cursor.execute("CREATE INDEX idx_applications_email_normalized ON applications(email_normalized)")
+
+def add_field_column(cursor, name):
+    """Gives a new form field its storage: a column, or in document storage nothing unless the field is promoted."""
+    if not get_storage_layout(cursor).document:
+        cursor.execute(f"ALTER TABLE applications ADD COLUMN {name} TEXT")
+    elif name in PROMOTED_COLUMNS:
+        cursor.execute(f"ALTER TABLE applications ADD COLUMN {generated_column_definition(name)}")
+
+def bump_config_version(cursor):
+    """Marks the draft form configuration as changed; every form_config/form_sections write bumps it."""
+    bump_metadata_counter(cursor, 'config_version')
+
+def get_active_form_version(conn):
+    """Returns (id, activated_at) of the form version applicants are served, or (0, None) before the first publish."""
+    return get_metadata_counter(conn, 'form_version')
+
+def activate_form_version(cursor, version_id):
+    cursor.execute('''
+        INSERT INTO app_metadata (key, value, updated_at) VALUES ('form_version', ?, CAST(strftime('%s', 'now') AS INTEGER))
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    ''', (version_id,))
+
+def publish_form_version(cursor, published_by=None):
+    """
+    Freezes the draft form configuration into a new, pre-serialized form version and makes it active.
+    Returns (version id, columns hidden for the compaction).
+    """
+    sections = build_public_form_config(cursor)
+    hidden = apply_form_version_schema(cursor, {field['name'] for fields in sections.values() for field in fields})
+    config_version = get_metadata_counter(cursor, 'config_version')[0]
+    version_id = cursor.execute(
+        "INSERT INTO form_versions (config, config_version, published_by) VALUES (?, ?, ?)",
+        (app.json.dumps(sections), config_version, published_by)
+    ).lastrowid
+    activate_form_version(cursor, version_id)
+    return version_id, hidden
+
+def get_form_version_fields(conn, version_id):
+    """Names of the fields a published form version collects."""
+    return {field.name for field in get_form_validator(conn, version_id).fields} if version_id else set()
+
+def apply_form_version_schema(cursor, fields, drop_unused=True):
+    """
+    Changes the applications table for the form version about to go live, collecting `fields`, so
+    draft edits never touch it: its fields get storage (a hidden column of a field it collects again
+    is kept instead). With drop_unused, answer columns of fields that only earlier versions collected
+    are hidden for the background compaction. Returns the newly hidden columns; raises ValueError while
+    a compaction is rebuilding the table.
+    """
+    dropped = []
+    if drop_unused:
+        published = set()
+        for (version_id,) in cursor.execute("SELECT id FROM form_versions").fetchall():
+            published |= get_form_version_fields(cursor, version_id)
+        dropped = sorted((published & set(get_application_columns(cursor))) - fields - set(CORE_FIELDS))
+    layout = get_storage_layout(cursor)
+    hidden = get_hidden_columns(cursor)
+    restored = sorted(fields & hidden)
+    added = [name for name in sorted(fields - hidden)
+             if not layout.has_column(name) and (not layout.document or name in PROMOTED_COLUMNS)]
+    # The compaction rebuilds applications from a snapshot of its columns
+    if (restored or added) and compaction_running(cursor):
+        raise ValueError("The applications table is being compacted. Please try again in a moment.")
+    cursor.executemany("DELETE FROM hidden_columns WHERE name = ?", [(name,) for name in restored])
+    for name in added:
+        add_field_column(cursor, name)
+    for name in dropped:
+        # Metadata only: the column (or answers key) is hidden at once and removed by the background compaction
+        cursor.execute("INSERT OR IGNORE INTO hidden_columns (name) VALUES (?)", (name,))
+        cursor.execute(f'DROP INDEX IF EXISTS "idx_applications_{name}"')
+        cursor.execute("DELETE FROM application_rollups WHERE dimension = ?", (name,))
+    if restored or added or dropped:
+        ensure_application_indexes(cursor)
+        bump_data_generation(cursor)
+    return dropped
+
+def resolve_form_version(conn, requested):
+    """The published version a submission was made against, or the active one if it names none that exists."""
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        requested = None
+    if requested and conn.execute("SELECT 1 FROM form_versions WHERE id = ?", (requested,)).fetchone():
+        return requested
+    return get_active_form_version(conn)[0] or None
+
+def normalize_status_emails(cursor):
+    """
+    Rewrites statuses and status_history stored before emails were normalized under the normalized email.
+    Rows whose emails normalize to the same one are merged first: the status changed most recently is kept
+    and their histories are combined. Returns whether anything changed.
+    """
+    cursor.execute('''
+        WITH ranked AS (
+            SELECT s.rowid AS row_id, ROW_NUMBER() OVER (
+                PARTITION BY lower(trim(s.email))
+                ORDER BY (SELECT MAX(h.id) FROM status_history h WHERE h.email = s.email) DESC NULLS LAST, s.rowid DESC
+            ) AS position
+            FROM statuses s
+        )
+        DELETE FROM statuses WHERE rowid IN (SELECT row_id FROM ranked WHERE position > 1)
+    ''')
+    merged = cursor.rowcount
+    cursor.execute("UPDATE status_history SET email = lower(trim(email)) WHERE email != lower(trim(email))")
+    cursor.execute("UPDATE statuses SET email = lower(trim(email)) WHERE email != lower(trim(email))")
+    return merged > 0 or cursor.rowcount > 0
 
 def init_db():
     """Initializes and migrates database tables, creates form config, and default admin."""
@@ -67,6 +357,42 @@ def init_db():
             )
         ''')
 
+        # --- Generation counters used to invalidate response caches ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS app_metadata (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0,
+                updated_at INTEGER
+            )
+        ''')
+        cursor.execute("PRAGMA table_info(app_metadata)")
+        if 'updated_at' not in [col['name'] for col in cursor.fetchall()]:
+            print("Migrating app_metadata: Adding 'updated_at' column...")
+            cursor.execute("ALTER TABLE app_metadata ADD COLUMN updated_at INTEGER")
+
+        # --- Deleted-field columns awaiting compaction, and the compaction job log ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hidden_columns (
+                name TEXT PRIMARY KEY,
+                hidden_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_compactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                columns TEXT NOT NULL,
+                status TEXT NOT NULL,
+                rows_copied INTEGER NOT NULL DEFAULT 0,
+                rows_total INTEGER NOT NULL DEFAULT 0,
+                started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                finished_at DATETIME,
+                error TEXT
+            )
+        ''')
+        # A compaction cut short by a restart leaves its shadow table behind; it is simply redone
+        cursor.execute("UPDATE schema_compactions SET status = 'interrupted', finished_at = CURRENT_TIMESTAMP WHERE status = 'running'")
+        discard_compaction_artifacts(cursor)
+
         # --- Dynamic Form Configuration Table ---
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS form_config (
@@ -97,13 +423,14 @@ def init_db():
 
 
         # --- Applications Table (Initially simple, will be altered by form config) ---
-        cursor.execute('''
+        document_column = f", {DOCUMENT_COLUMN} TEXT NOT NULL DEFAULT '{{}}'" if APPLICATION_STORAGE == 'document' else ''
+        cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS applications (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT,
                 email TEXT UNIQUE,
                 submission_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                resume_path TEXT
+                resume_path TEXT{document_column}
             )
         ''')
         
@@ -112,91 +439,29 @@ def init_db():
         if 'resume_path' not in app_columns:
             print("Migrating applications: Adding 'resume_path' column...")
             cursor.execute("ALTER TABLE applications ADD COLUMN resume_path TEXT")
+        if 'email_normalized' not in app_columns:
+            print("Migrating applications: Adding 'email_normalized' column...")
+            cursor.execute("ALTER TABLE applications ADD COLUMN email_normalized TEXT")
+        if 'form_version' not in app_columns:
+            print("Migrating applications: Adding 'form_version' column...")
+            cursor.execute("ALTER TABLE applications ADD COLUMN form_version INTEGER")
+        # Rows written by older code paths still need their join key
+        cursor.execute("UPDATE applications SET email_normalized = lower(trim(email)) WHERE email_normalized IS NULL AND email IS NOT NULL")
 
 
         # --- Populate Form Config if it's empty ---
         cursor.execute("SELECT COUNT(id) as count FROM form_config")
         if cursor.fetchone()['count'] == 0:
             print("Form config is empty. Populating with fields from recruitment-form.html...")
-            
-            # This list is now based on the user-provided recruitment-form.html
-            default_fields = [
-                # Personal Details
-                {'name': 'name', 'label': 'Full Name', 'type': 'text', 'subsection': 'Personal Details', 'required': 1, 'is_core': 1},
-                {'name': 'email', 'label': 'Email Address', 'type': 'email', 'subsection': 'Personal Details', 'required': 1, 'is_core': 1},
-                {'name': 'dob', 'label': 'Date of Birth', 'type': 'date', 'subsection': 'Personal Details', 'required': 1},
-                {'name': 'place_of_birth', 'label': 'Place of Birth', 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
-                {'name': 'gender', 'label': 'Gender', 'type': 'select', 'options': 'Male, Female, Other', 'subsection': 'Personal Details', 'required': 0},
-                {'name': 'nationality', 'label': 'Nationality', 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
-                {'name': 'father_name', 'label': "Father's Name", 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
-                {'name': 'blood_group', 'label': 'Blood Group', 'type': 'select', 'options': 'A+, A-, B+, B-, AB+, AB-, O+, O-', 'subsection': 'Personal Details', 'required': 0},
-                {'name': 'pan_card', 'label': 'PAN Card Number', 'type': 'text', 'subsection': 'Personal Details', 'required': 0},
-                {'name': 'marital_status', 'label': 'Marital Status', 'type': 'select', 'options': 'Single, Married, Divorced, Widowed', 'subsection': 'Personal Details', 'required': 0},
-                
-                # Spouse's Details
-                {'name': 'spouse_name', 'label': "Spouse's Name", 'type': 'text', 'subsection': "Spouse's Details", 'required': 0},
-                {'name': 'spouse_employment', 'label': "Spouse's Employment Status", 'type': 'text', 'subsection': "Spouse's Details", 'required': 0},
-                {'name': 'spouse_work_details', 'label': 'Spouse Work Details', 'type': 'textarea', 'subsection': "Spouse's Details", 'required': 0},
-                {'name': 'children_count', 'label': 'Number of Children', 'type': 'number', 'subsection': "Spouse's Details", 'required': 0},
-
-                # Contact & Position
-                {'name': 'mobile_number', 'label': 'Mobile Number', 'type': 'tel', 'subsection': 'Contact & Position', 'required': 1},
-                {'name': 'business_entity', 'label': 'Business Entity', 'type': 'select', 'options': 'SIL, ZIL, ZMSL, ZIIL', 'subsection': 'Contact & Position', 'required': 0},
-                {'name': 'post_applying_for', 'label': 'Post Applying For', 'type': 'select', 'options': 'Intern, Civil Engineer, Graduate Engineer Trainee, Software Developer Trainee, Data Analyst Trainee, Business Development Executive, Human Resources Trainee, Marketing Trainee', 'subsection': 'Contact & Position', 'required': 0},
-                {'name': 'location_of_position', 'label': 'Location of Position', 'type': 'select', 'options': 'Gurugram, Pune, Bangalore', 'subsection': 'Contact & Position', 'required': 0},
-                {'name': 'present_address', 'label': 'Present Address', 'type': 'textarea', 'subsection': 'Contact & Position', 'required': 1},
-                {'name': 'permanent_address', 'label': 'Permanent Address', 'type': 'textarea', 'subsection': 'Contact & Position', 'required': 0},
-                {'name': 'hobbies', 'label': 'Hobbies / Leisure Activities', 'type': 'text', 'subsection': 'Contact & Position', 'required': 0},
-
-                # Academic Qualifications
-                {'name': 'qualification_10th_school', 'label': '10th School/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_10th_board', 'label': '10th Board', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_10th_subjects', 'label': '10th Main Subjects', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_10th_year', 'label': '10th Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_10th_marks', 'label': '10th % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_10th_division', 'label': '10th Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                
-                {'name': 'qualification_12th_school', 'label': '12th School/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_12th_board', 'label': '12th Board/University', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_12th_specialization', 'label': '12th Course Specialization', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_12th_year', 'label': '12th Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_12th_marks', 'label': '12th % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_12th_division', 'label': '12th Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-
-                {'name': 'qualification_grad_school', 'label': 'Graduation Institute/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_grad_course', 'label': 'Graduation Course', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_grad_specialization', 'label': 'Graduation Course Specialization', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_grad_year', 'label': 'Graduation Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_grad_marks', 'label': 'Graduation % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_grad_division', 'label': 'Graduation Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-
-                {'name': 'qualification_pg_school', 'label': 'Post-Graduation Institute/College', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_pg_course', 'label': 'Post-Graduation Course', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_pg_specialization', 'label': 'Post-Graduation Course Specialization', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_pg_year', 'label': 'Post-Graduation Year of Passing', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_pg_marks', 'label': 'Post-Graduation % Marks / CGPA', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-                {'name': 'qualification_pg_division', 'label': 'Post-Graduation Division/Class', 'type': 'text', 'subsection': 'Academic Qualifications', 'required': 0},
-
-                # Additional Information
-                {'name': 'previously_applied', 'label': 'Have you applied with us earlier?', 'type': 'radio', 'options': 'Yes, No', 'subsection': 'Additional Information', 'required': 0},
-                {'name': 'related_employee', 'label': 'Are you related to any employee?', 'type': 'radio', 'options': 'Yes, No', 'subsection': 'Additional Information', 'required': 0},
-                {'name': 'related_employee_details', 'label': 'If yes, provide details', 'type': 'textarea', 'subsection': 'Additional Information', 'required': 0},
-                {'name': 'legal_cases', 'label': 'Are there any criminal/civil cases against you?', 'type': 'radio', 'options': 'Yes, No', 'subsection': 'Additional Information', 'required': 0},
-                {'name': 'legal_cases_details', 'label': 'If yes, provide details', 'type': 'textarea', 'subsection': 'Additional Information', 'required': 0},
-            ]
 
-            cursor.execute("PRAGMA table_info(applications)")
-            existing_columns = [row['name'] for row in cursor.fetchall()]
+            layout = get_storage_layout(cursor)
 
-            for i, field in enumerate(default_fields):
-                field.setdefault('is_core', 0)
-                field.setdefault('options', None)
-                field.setdefault('required', 0)
+            for i, field in enumerate(DEFAULT_FIELDS):
+                field = {'is_core': 0, 'options': None, 'required': 0, **field}
                 
-                if field['name'] not in existing_columns:
+                if not layout.has_column(field['name']):
                     try:
-                        cursor.execute(f"ALTER TABLE applications ADD COLUMN {field['name']} TEXT")
-                        print(f"Added column '{field['name']}' to applications table.")
+                        add_field_column(cursor, field['name'])
                     except sqlite3.OperationalError as e:
                         print(f"Could not add column {field['name']}: {e}")
                 
@@ -204,8 +469,146 @@ def init_db():
                     "INSERT INTO form_config (name, label, type, subsection, options, required, is_core, field_order) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
                     (field['name'], field['label'], field['type'], field['subsection'], field.get('options'), field['required'], field['is_core'], i)
                 )
+            bump_config_version(cursor)
             print("Default form config populated with all fields.")
 
+        ensure_application_indexes(cursor)
+
+        # --- Published form versions; applicants are served the active snapshot ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS form_versions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                config TEXT NOT NULL,
+                config_version INTEGER NOT NULL,
+                published_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                published_by TEXT
+            )
+        ''')
+        cursor.execute("SELECT COUNT(*) FROM form_versions")
+        if cursor.fetchone()[0] == 0:
+            # Existing databases keep serving the form they had before publishing was introduced
+            print("Publishing the current form configuration as version 1...")
+            publish_form_version(cursor)
+
+        # --- Idempotency keys of delivered submissions, so a retried delivery never adds a second application ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS submission_receipts (
+                idempotency_key TEXT PRIMARY KEY,
+                application_id INTEGER,
+                received_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # --- Bulk spreadsheet imports and their progress ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS application_imports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename TEXT,
+                status TEXT NOT NULL,
+                rows_total INTEGER NOT NULL DEFAULT 0,
+                rows_processed INTEGER NOT NULL DEFAULT 0,
+                inserted INTEGER NOT NULL DEFAULT 0,
+                duplicates INTEGER NOT NULL DEFAULT 0,
+                invalid INTEGER NOT NULL DEFAULT 0,
+                mapping TEXT,
+                errors TEXT,
+                started_by TEXT,
+                started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                finished_at DATETIME,
+                error TEXT
+            )
+        ''')
+        cursor.execute("UPDATE application_imports SET status = 'interrupted', finished_at = CURRENT_TIMESTAMP WHERE status IN ('queued', 'running')")
+
+        # --- Audit trail of status changes, appended on every transition ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS status_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL,
+                from_status TEXT NOT NULL,
+                to_status TEXT NOT NULL,
+                changed_by TEXT,
+                changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_status_history_email ON status_history(email, id)')
+        statuses_normalized = normalize_status_emails(cursor)
+
+        # --- Pipeline analytics, maintained from the status transitions ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pipeline_state (
+                email TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                entered_at DATETIME,
+                furthest INTEGER NOT NULL DEFAULT 0,
+                post_applying_for TEXT,
+                location_of_position TEXT,
+                business_entity TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stage_durations (
+                stage TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                total_hours REAL NOT NULL DEFAULT 0,
+                min_hours REAL,
+                max_hours REAL,
+                PRIMARY KEY (stage, bucket)
+            )
+        ''')
+        cursor.execute("PRAGMA table_info(stage_durations)")
+        stage_duration_columns = [col['name'] for col in cursor.fetchall()]
+        if 'min_hours' not in stage_duration_columns:
+            print("Migrating stage_durations: Adding 'min_hours' and 'max_hours' columns...")
+            cursor.execute("ALTER TABLE stage_durations ADD COLUMN min_hours REAL")
+            cursor.execute("ALTER TABLE stage_durations ADD COLUMN max_hours REAL")
+            cursor.execute("DELETE FROM pipeline_state")  # Rebuilt below, so every bucket gets its range
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stage_flow (
+                period TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                entered INTEGER NOT NULL DEFAULT 0,
+                advanced INTEGER NOT NULL DEFAULT 0,
+                dropped INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, stage)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS funnel_reach (
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, value, stage)
+            )
+        ''')
+
+        # --- Precomputed counters for the unfiltered dashboard ---
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS application_rollups (
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, value)
+            )
+        ''')
+        # The rollups double as the facet index: typeahead prefix lookups and top-N by count
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_application_rollups_prefix ON application_rollups(dimension, value COLLATE NOCASE)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_application_rollups_top ON application_rollups(dimension, count DESC)')
+        cursor.execute("SELECT COUNT(*) FROM application_rollups")
+        if cursor.fetchone()[0] == 0 or statuses_normalized:
+            print("Building application rollups...")
+            rebuild_rollups(conn, commit=False)
+        # Rebuilt while any applicant has not entered the pipeline yet, e.g. applications from before it existed
+        cursor.execute('''
+            SELECT 1 FROM applications a WHERE a.email_normalized != ''
+            AND NOT EXISTS (SELECT 1 FROM pipeline_state p WHERE p.email = a.email_normalized) LIMIT 1
+        ''')
+        if cursor.fetchone() is not None or statuses_normalized:
+            print("Building pipeline analytics...")
+            rebuild_pipeline_analytics(conn, commit=False)
+
         # --- Create Default Admin ---
         cursor.execute("SELECT id FROM users WHERE role = 'admin' LIMIT 1")
         if cursor.fetchone() is None:
@@ -217,6 +620,922 @@ def init_db():
         conn.close()
         print("Database initialized successfully.")
 
+# --- Application Rollups ---
+# application_rollups holds one counter per (dimension, value): 'Status' counts applications by
+# their resolved status and every ROLLUP_DIMENSIONS column counts its non-NULL values. The write
+# paths update it through application_rollups.py in the same transaction as their change, so an
+# unfiltered dashboard load reads one row per group instead of scanning every application. The
+# recount and repair helpers below check it against the applications table.
+
+def compute_rollups(conn):
+    """Recounts every rollup from the applications table and returns {(dimension, value): count}."""
+    app_columns = get_application_columns(conn)
+    counts = defaultdict(int)
+    for row in conn.execute('''
+        SELECT COALESCE(s.status, 'Applied'), COUNT(*)
+        FROM applications a LEFT JOIN statuses s ON s.email = a.email_normalized
+        GROUP BY 1
+    '''):
+        counts[('Status', str(row[0]))] += row[1]
+    for col in ROLLUP_DIMENSIONS:
+        if col in app_columns:
+            for row in conn.execute(f'SELECT {app_columns[col]}, COUNT(*) FROM applications a WHERE {app_columns[col]} IS NOT NULL GROUP BY 1'):
+                counts[(col, str(row[0]))] += row[1]
+    return dict(counts)
+
+def rebuild_rollups(conn, commit=True):
+    """Replaces the stored rollups with a full recount and returns the number of counters."""
+    counts = compute_rollups(conn)
+    conn.execute("DELETE FROM application_rollups")
+    conn.executemany("INSERT INTO application_rollups (dimension, value, count) VALUES (?, ?, ?)",
+                     [(dimension, value, count) for (dimension, value), count in counts.items()])
+    if commit:
+        conn.commit()
+    return len(counts)
+
+def verify_rollups(conn):
+    """Returns [(dimension, value, stored, actual)] for every counter that has drifted."""
+    stored = {(row[0], row[1]): row[2] for row in conn.execute("SELECT dimension, value, count FROM application_rollups WHERE count != 0")}
+    actual = compute_rollups(conn)
+    return sorted((dimension, value, stored.get((dimension, value), 0), actual.get((dimension, value), 0))
+                  for dimension, value in set(stored) | set(actual)
+                  if stored.get((dimension, value), 0) != actual.get((dimension, value), 0))
+
+def read_rollups(conn):
+    """Returns the stored counters as {dimension: {value: count}}."""
+    rollups = defaultdict(dict)
+    for row in conn.execute("SELECT dimension, value, count FROM application_rollups WHERE count > 0"):
+        rollups[row['dimension']][row['value']] = row['count']
+    return rollups
+
+@app.cli.command('verify-rollups')
+def verify_rollups_command():
+    """Compares the dashboard rollups against a full recount of the applications table."""
+    conn = get_db_conn()
+    try:
+        drift = verify_rollups(conn)
+    finally:
+        conn.close()
+    if not drift:
+        print("Rollups match the applications table.")
+        return
+    for dimension, value, stored, actual in drift:
+        print(f"{dimension}={value!r}: stored {stored}, actual {actual}")
+    print(f"{len(drift)} counter(s) have drifted. Run `flask --app app rebuild-rollups` to repair them.")
+    raise SystemExit(1)
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recomputes the dashboard rollups from the applications table."""
+    conn = get_db_conn()
+    try:
+        groups = rebuild_rollups(conn)
+    finally:
+        conn.close()
+    print(f"Rebuilt {groups} rollup counter(s).")
+
+@app.cli.command('validate-applications')
+def validate_applications_command():
+    """Checks every stored application against the validation rules of the active form version."""
+    conn = get_db_conn()
+    try:
+        validator = get_form_validator(conn)
+        select_columns = ', '.join(f'{expr} AS "{col}"' for col, expr in get_application_columns(conn).items())
+        cursor = conn.execute(f"SELECT {select_columns} FROM applications a ORDER BY a.id")
+        checked = invalid = 0
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            checked += len(rows)
+            for row, errors in validator.validate_rows(dict(row) for row in rows):
+                invalid += 1
+                print(f"Application {row['id']} ({row.get('email')}): " + '; '.join(f"{name}: {message}" for name, message in errors.items()))
+    finally:
+        conn.close()
+    print(f"{invalid} of {checked} application(s) fail validation.")
+    if invalid:
+        raise SystemExit(1)
+
+# --- Pipeline Analytics ---
+# Time in stage, stage conversion over time and cohort funnels are kept up to date by every status
+# transition, so the analytics endpoints read small aggregates instead of replaying status_history:
+#   pipeline_state   each applicant's current stage and when they entered it, the furthest funnel stage
+#                    they reached, and the post, location and entity they applied for
+#   stage_durations  histogram of completed stays per stage in STAGE_DURATION_BUCKETS, with the shortest
+#                    and longest stay in each bucket, from which the median and p90 are interpolated
+#   stage_flow       per day and stage, applicants who entered it, moved on to a later funnel stage, or
+#                    left it any other way (rejected, or moved back)
+#   funnel_reach     per cohort value, applicants who reached each funnel stage; skipping a stage counts
+#                    as reaching it
+# Applicants enter the pipeline at 'Applied' when their application is inserted (record_pipeline_entries).
+
+def _stage_index(status):
+    return FUNNEL_STAGES.index(status) if status in FUNNEL_STAGES else -1
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+def read_pipeline_entries(cursor, emails=None):
+    """Application rows (email and cohort columns) to enter into the pipeline, of the given emails or all, oldest first."""
+    app_columns = get_application_columns(cursor.connection)
+    cohorts = ', '.join(f'{app_columns[col]} AS "{col}"' if col in app_columns else f'NULL AS "{col}"'
+                        for col in COHORT_DIMENSIONS.values())
+    where_sql = "WHERE a.email_normalized IN (SELECT value FROM json_each(?))" if emails is not None else ''
+    return [dict(row) for row in cursor.execute(f"SELECT a.email_normalized AS email, {cohorts} FROM applications a {where_sql} ORDER BY a.id",
+                                                (json.dumps(sorted(emails)),) if emails is not None else ())]
+
+def load_pipeline_states(cursor, emails):
+    """{email: state} of the given applicants; one not in the pipeline yet is entered at 'Applied' first."""
+    emails = set(emails)
+    select_sql = "SELECT * FROM pipeline_state WHERE email IN (SELECT value FROM json_each(?))"
+    states = {row['email']: dict(row) for row in cursor.execute(select_sql, (json.dumps(sorted(emails)),))}
+    missing = emails - set(states)
+    if missing:
+        record_pipeline_entries(cursor, read_pipeline_entries(cursor, missing))
+        states.update({row['email']: dict(row) for row in cursor.execute(select_sql, (json.dumps(sorted(missing)),))})
+    return states
+
+def record_stage_transitions(cursor, transitions, changed_at):
+    """
+    Adds status transitions [(email, from_status, to_status)] made at `changed_at` to the pipeline
+    analytics. A from_status of None places an applicant in to_status at an unknown time.
+    """
+    states = load_pipeline_states(cursor, [email for email, _, _ in transitions])
+    at, day = _parse_timestamp(changed_at), changed_at[:10]
+    durations, flow, reach, touched = defaultdict(lambda: [0, 0.0, None, None]), defaultdict(lambda: [0, 0, 0]), defaultdict(int), set()
+
+    def advance(state, status):
+        for stage in FUNNEL_STAGES[state['furthest'] + 1:_stage_index(status) + 1]:
+            reach[(*FUNNEL_COHORT_ALL, stage)] += 1
+            for col in COHORT_DIMENSIONS.values():
+                if state[col] is not None:
+                    reach[(col, str(state[col]), stage)] += 1
+        state['furthest'] = max(state['furthest'], _stage_index(status))
+
+    for email, from_status, to_status in transitions:
+        state = states.get(email)
+        if state is None:
+            continue  # A status for an email with no application is not part of the pipeline
+        touched.add(email)
+        if state['stage'] != (from_status or to_status):
+            state['entered_at'] = None  # Entered outside the recorded history, at an unknown time
+        if from_status is None:
+            advance(state, to_status)
+            state['stage'] = to_status
+            continue
+        advance(state, from_status)
+        entered = _parse_timestamp(state['entered_at'])
+        if entered is not None and at is not None:
+            hours = max((at - entered).total_seconds() / 3600, 0)
+            bucket = durations[(from_status, bisect.bisect_left(STAGE_DURATION_BUCKETS, hours))]
+            bucket[0] += 1
+            bucket[1] += hours
+            bucket[2] = hours if bucket[2] is None else min(bucket[2], hours)
+            bucket[3] = hours if bucket[3] is None else max(bucket[3], hours)
+        flow[(day, from_status)][1 if _stage_index(to_status) > _stage_index(from_status) else 2] += 1
+        flow[(day, to_status)][0] += 1
+        advance(state, to_status)
+        state['stage'], state['entered_at'] = to_status, changed_at
+
+    cursor.executemany('''
+        INSERT INTO stage_durations (stage, bucket, count, total_hours, min_hours, max_hours) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(stage, bucket) DO UPDATE SET count = count + excluded.count, total_hours = total_hours + excluded.total_hours,
+            min_hours = MIN(COALESCE(min_hours, excluded.min_hours), excluded.min_hours),
+            max_hours = MAX(COALESCE(max_hours, excluded.max_hours), excluded.max_hours)
+    ''', [(stage, bucket, *values) for (stage, bucket), values in durations.items()])
+    cursor.executemany('''
+        INSERT INTO stage_flow (period, stage, entered, advanced, dropped) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(period, stage) DO UPDATE SET entered = entered + excluded.entered,
+            advanced = advanced + excluded.advanced, dropped = dropped + excluded.dropped
+    ''', [(period, stage, *counts) for (period, stage), counts in flow.items()])
+    cursor.executemany('''
+        INSERT INTO funnel_reach (dimension, value, stage, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT(dimension, value, stage) DO UPDATE SET count = count + excluded.count
+    ''', [(*key, count) for key, count in reach.items()])
+    columns = ['email', 'stage', 'entered_at', 'furthest', *COHORT_DIMENSIONS.values()]
+    cursor.executemany(f'''
+        INSERT INTO pipeline_state ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+        ON CONFLICT(email) DO UPDATE SET stage = excluded.stage, entered_at = excluded.entered_at, furthest = excluded.furthest
+    ''', [tuple(states[email][col] for col in columns) for email in sorted(touched)])
+
+def rebuild_pipeline_analytics(conn, commit=True):
+    """
+    Recomputes the pipeline analytics by entering every applicant at their submission and replaying
+    status_history; returns the number of transitions replayed.
+    """
+    cursor = conn.cursor()
+    for table in ('pipeline_state', 'stage_durations', 'stage_flow', 'funnel_reach'):
+        cursor.execute(f"DELETE FROM {table}")
+    record_pipeline_entries(cursor, read_pipeline_entries(cursor))
+    # Statuses set before the history was recorded are where those applicants start, at an unknown time
+    seeded = cursor.execute('''
+        SELECT s.email, NULL, s.status FROM statuses s
+        WHERE NOT EXISTS (SELECT 1 FROM status_history h WHERE h.email = s.email)
+    ''').fetchall()
+    record_stage_transitions(cursor, [tuple(row) for row in seeded], datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+    replayed = 0
+    history = conn.execute("SELECT email, from_status, to_status, changed_at FROM status_history ORDER BY id")
+    # A bulk move shares one timestamp, so it is replayed as one batch
+    for changed_at, events in itertools.groupby(history, key=lambda row: row['changed_at']):
+        events = [(row['email'], row['from_status'], row['to_status']) for row in events]
+        record_stage_transitions(cursor, events, changed_at)
+        replayed += len(events)
+    if commit:
+        conn.commit()
+    return replayed
+
+def _histogram_quantile(buckets, q):
+    """
+    Interpolates the q-quantile, in hours, of a duration histogram [(bucket, count, total_hours,
+    min_hours, max_hours)] in bucket order, between the shortest and longest stay of its bucket, so it
+    never falls outside the stays actually recorded.
+    """
+    target = q * sum(bucket[1] for bucket in buckets)
+    seen = 0
+    for _, count, _, shortest, longest in buckets:
+        if count and seen + count >= target:
+            return shortest + (longest - shortest) * (target - seen) / count
+        seen += count
+    return None
+
+def build_time_in_stage(conn, args):
+    """Median, p90 and mean hours of the completed stays in each stage."""
+    histograms = defaultdict(list)
+    for row in conn.execute("SELECT stage, bucket, count, total_hours, min_hours, max_hours FROM stage_durations WHERE count > 0 ORDER BY stage, bucket"):
+        histograms[row['stage']].append((row['bucket'], row['count'], row['total_hours'], row['min_hours'], row['max_hours']))
+    stages = [stage for stage in FUNNEL_STAGES if stage in histograms] + sorted(set(histograms) - set(FUNNEL_STAGES))
+    result = {}
+    for stage in stages:
+        buckets = histograms[stage]
+        count = sum(bucket[1] for bucket in buckets)
+        result[stage] = {
+            "count": count,
+            "median_hours": round(_histogram_quantile(buckets, 0.5), 1),
+            "p90_hours": round(_histogram_quantile(buckets, 0.9), 1),
+            "mean_hours": round(sum(bucket[2] for bucket in buckets) / count, 1),
+        }
+    return result
+
+def build_stage_conversion(conn, args):
+    """
+    Per day, week or month (`interval`) and stage: applicants who entered the stage, moved on to a later
+    funnel stage, or dropped out of it, with the share of those leaving who moved on.
+    """
+    interval = args.get('interval', 'week')
+    periods_sql = {'day': "period", 'week': "date(period, '-6 days', 'weekday 1')", 'month': "strftime('%Y-%m-01', period)"}
+    if interval not in periods_sql:
+        raise ValueError("interval must be day, week or month.")
+    conditions, params = [], []
+    if args.get('start_date'):
+        conditions.append("period >= ?")
+        params.append(_normalize_timestamp(args['start_date'])[:10])
+    if args.get('end_date'):
+        conditions.append("period <= ?")
+        params.append(_normalize_timestamp(args['end_date'])[:10])
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    periods = defaultdict(dict)
+    for period, stage, entered, advanced, dropped in conn.execute(f'''
+        SELECT {periods_sql[interval]}, stage, SUM(entered), SUM(advanced), SUM(dropped)
+        FROM stage_flow {where_sql} GROUP BY 1, 2 ORDER BY 1
+    ''', params):
+        left = advanced + dropped
+        periods[period][stage] = {"entered": entered, "advanced": advanced, "dropped": dropped,
+                                  "conversion_rate": round(advanced / left * 100, 2) if left else None}
+    return {"interval": interval, "periods": [{"period": period, "stages": stages} for period, stages in periods.items()]}
+
+def build_cohort_funnel(conn, args):
+    """Applicants reaching each funnel stage, overall or per post, location or entity (`by`), with stage-to-stage conversion."""
+    by = args.get('by')
+    if by and by not in COHORT_DIMENSIONS:
+        raise ValueError(f"by must be one of: {', '.join(COHORT_DIMENSIONS)}.")
+    dimension = COHORT_DIMENSIONS[by] if by else FUNNEL_COHORT_ALL[0]
+    reached = defaultdict(dict)
+    for row in conn.execute("SELECT value, stage, count FROM funnel_reach WHERE dimension = ? AND count > 0", (dimension,)):
+        reached[row['value']][row['stage']] = row['count']
+    cohorts = []
+    for value in sorted(reached, key=lambda value: (-reached[value].get(FUNNEL_STAGES[0], 0), value)):
+        counts = [reached[value].get(stage, 0) for stage in FUNNEL_STAGES]
+        cohorts.append({"value": value, "counts": counts,
+                        "conversion": [round(counts[i + 1] / counts[i] * 100, 2) if counts[i] else None for i in range(len(counts) - 1)]})
+    return {"stages": FUNNEL_STAGES, "by": by, "cohorts": cohorts}
+
+@app.cli.command('rebuild-pipeline-analytics')
+def rebuild_pipeline_analytics_command():
+    """Recomputes time in stage, stage conversion and cohort funnels from status_history."""
+    conn = get_db_conn()
+    try:
+        replayed = rebuild_pipeline_analytics(conn)
+    finally:
+        conn.close()
+    print(f"Replayed {replayed} status transition(s).")
+
+# --- Online Schema Changes ---
+# Publishing a form version without a field only hides its column (hidden_columns), which is instant. A background
+# compaction then drops hidden columns by copying applications into a shadow table built from the
+# original CREATE TABLE statement (so UNIQUE constraints and defaults survive), one short chunk per
+# transaction. Triggers log rows updated or deleted meanwhile into compaction_changes, and a final
+# short transaction copies the tail, re-copies changed rows, swaps the tables and recreates indexes.
+# In document storage a deleted field usually has no column; its key is stripped from the answers
+# of every row instead, in the same chunked fashion, so a field re-added later starts out empty.
+
+COMPACTION_TABLE = 'applications_compact'
+_compaction_lock = threading.Lock()
+
+def split_table_definitions(create_sql):
+    """Splits the body of a CREATE TABLE statement into its top-level column and constraint definitions."""
+    body = create_sql[create_sql.index('(') + 1:create_sql.rindex(')')]
+    definitions, current, depth, quote = [], [], 0, None
+    for ch in body:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in '\'"`[':
+            quote = ']' if ch == '[' else ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            definitions.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    definitions.append(''.join(current).strip())
+    return [definition for definition in definitions if definition]
+
+def _definition_column(definition):
+    return definition.split(None, 1)[0].strip('"`[]')
+
+def _dependent_sql(conn, columns):
+    """CREATE statements of the indexes and triggers on applications that do not mention any of `columns`."""
+    return [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = 'applications' AND sql IS NOT NULL AND name NOT LIKE 'compaction_track_%'")
+        if not any(re.search(rf'\b{re.escape(col)}\b', row[0]) for col in columns)]
+
+def discard_compaction_artifacts(cursor):
+    cursor.execute("DROP TRIGGER IF EXISTS compaction_track_update")
+    cursor.execute("DROP TRIGGER IF EXISTS compaction_track_delete")
+    cursor.execute("DROP TABLE IF EXISTS compaction_changes")
+    cursor.execute(f"DROP TABLE IF EXISTS {COMPACTION_TABLE}")
+
+def compact_applications(conn, pause=COMPACTION_PAUSE_SECONDS):
+    """
+    Physically drops the hidden columns from applications without holding the write lock for more
+    than one chunk at a time. Returns the finished schema_compactions row id, or None if nothing was hidden.
+    """
+    hidden = sorted(get_hidden_columns(conn))
+    if not hidden:
+        return None
+    job_id = conn.execute("INSERT INTO schema_compactions (columns, status) VALUES (?, 'running')", (json.dumps(hidden),)).lastrowid
+    conn.commit()
+    try:
+        layout = get_storage_layout(conn)
+        document_keys = [col for col in hidden if not layout.has_column(col)]
+        if document_keys:
+            strip_document_keys(conn, job_id, document_keys, pause)
+        columns = [col for col in hidden if layout.has_column(col)]
+        if not columns:
+            _finish_compaction(conn, job_id, hidden)
+            return job_id
+
+        create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'applications'").fetchone()[0]
+        definitions = [d for d in split_table_definitions(create_sql) if _definition_column(d) not in columns]
+        kept = [row[1] for row in conn.execute("PRAGMA table_info(applications)") if row[1] not in columns]
+        column_list = ', '.join(f'"{col}"' for col in kept)
+        # Indexes and triggers to recreate; those on the dropped columns go with them
+        dependents = _dependent_sql(conn, columns)
+
+        discard_compaction_artifacts(conn)
+        conn.execute(f"CREATE TABLE {COMPACTION_TABLE} ({', '.join(definitions)})")
+        conn.execute("CREATE TABLE compaction_changes (id INTEGER PRIMARY KEY)")
+        conn.execute('''
+            CREATE TRIGGER compaction_track_update AFTER UPDATE ON applications BEGIN
+                INSERT OR IGNORE INTO compaction_changes (id) VALUES (OLD.id);
+                INSERT OR IGNORE INTO compaction_changes (id) VALUES (NEW.id);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER compaction_track_delete AFTER DELETE ON applications BEGIN
+                INSERT OR IGNORE INTO compaction_changes (id) VALUES (OLD.id);
+            END
+        ''')
+        total = conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+        conn.execute("UPDATE schema_compactions SET rows_total = ? WHERE id = ?", (total, job_id))
+        conn.commit()
+
+        copy_sql = f"INSERT INTO {COMPACTION_TABLE} ({column_list}) SELECT {column_list} FROM applications WHERE id > ? ORDER BY id LIMIT ?"
+        last_id = 0
+        while True:
+            copied = conn.execute(copy_sql, (last_id, COMPACTION_CHUNK_SIZE)).rowcount
+            if copied <= 0:
+                conn.rollback()
+                break
+            last_id = conn.execute(f"SELECT MAX(id) FROM {COMPACTION_TABLE}").fetchone()[0]
+            conn.execute("UPDATE schema_compactions SET rows_copied = rows_copied + ? WHERE id = ?", (copied, job_id))
+            conn.commit()
+            time.sleep(pause)
+
+        conn.execute("BEGIN IMMEDIATE")
+        current = {row[1] for row in conn.execute("PRAGMA table_info(applications)")}
+        if current - set(kept) - get_hidden_columns(conn):
+            raise RuntimeError("applications gained new columns during compaction")
+        conn.execute(f"INSERT INTO {COMPACTION_TABLE} ({column_list}) SELECT {column_list} FROM applications WHERE id > ?", (last_id,))
+        conn.execute(f"DELETE FROM {COMPACTION_TABLE} WHERE id IN (SELECT id FROM compaction_changes)")
+        conn.execute(f"INSERT INTO {COMPACTION_TABLE} ({column_list}) SELECT {column_list} FROM applications WHERE id IN (SELECT id FROM compaction_changes)")
+        conn.execute("DROP TABLE applications")
+        conn.execute(f"ALTER TABLE {COMPACTION_TABLE} RENAME TO applications")
+        conn.execute("DROP TABLE compaction_changes")
+        for sql in dependents:
+            conn.execute(sql)
+        _finish_compaction(conn, job_id, hidden)
+        return job_id
+    except Exception as e:
+        conn.rollback()
+        discard_compaction_artifacts(conn)
+        conn.execute("UPDATE schema_compactions SET status = 'failed', finished_at = CURRENT_TIMESTAMP, error = ? WHERE id = ?", (str(e), job_id))
+        conn.commit()
+        raise
+
+def strip_document_keys(conn, job_id, keys, pause=COMPACTION_PAUSE_SECONDS):
+    """Removes the keys of deleted fields from every answers document, one chunk of rows per transaction."""
+    total = conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+    conn.execute("UPDATE schema_compactions SET rows_total = ? WHERE id = ?", (total, job_id))
+    conn.commit()
+    paths = ', '.join(f"'{json_path(key)}'" for key in keys)
+    last_id = 0
+    while True:
+        chunk = conn.execute("SELECT COUNT(*), MAX(id) FROM (SELECT id FROM applications WHERE id > ? ORDER BY id LIMIT ?)",
+                             (last_id, COMPACTION_CHUNK_SIZE)).fetchone()
+        if not chunk[0]:
+            break
+        conn.execute(f"UPDATE applications SET {DOCUMENT_COLUMN} = json_remove({DOCUMENT_COLUMN}, {paths}) WHERE id > ? AND id <= ?", (last_id, chunk[1]))
+        conn.execute("UPDATE schema_compactions SET rows_copied = rows_copied + ? WHERE id = ?", (chunk[0], job_id))
+        conn.commit()
+        last_id = chunk[1]
+        time.sleep(pause)
+
+def _finish_compaction(conn, job_id, hidden):
+    conn.executemany("DELETE FROM hidden_columns WHERE name = ?", [(col,) for col in hidden])
+    ensure_application_indexes(conn.cursor())
+    conn.execute('''
+        UPDATE schema_compactions SET status = 'completed', finished_at = CURRENT_TIMESTAMP,
+            rows_copied = (SELECT COUNT(*) FROM applications), rows_total = (SELECT COUNT(*) FROM applications)
+        WHERE id = ?
+    ''', (job_id,))
+    bump_data_generation(conn)
+    conn.commit()
+
+def start_compaction():
+    """Runs compact_applications in a background thread unless one is already running in this process."""
+    if not _compaction_lock.acquire(blocking=False):
+        return False
+    def run():
+        conn = get_db_conn()
+        try:
+            # Fields deleted while a pass runs are picked up by the next one
+            while compact_applications(conn) is not None:
+                pass
+        except Exception:
+            print(f"--- COMPACTION ERROR ---\n{traceback.format_exc()}")
+        finally:
+            conn.close()
+            _compaction_lock.release()
+    threading.Thread(target=run, name='applications-compaction', daemon=True).start()
+    return True
+
+def compaction_running(conn):
+    row = conn.execute("SELECT 1 FROM schema_compactions WHERE status = 'running' LIMIT 1").fetchone()
+    return row is not None
+
+def get_compaction_status(conn):
+    job = conn.execute("SELECT * FROM schema_compactions ORDER BY id DESC LIMIT 1").fetchone()
+    status = {"hidden_columns": sorted(get_hidden_columns(conn)), "job": None}
+    if job:
+        status["job"] = dict(job, columns=json.loads(job['columns']))
+        status["job"]["progress"] = round(job['rows_copied'] / job['rows_total'] * 100, 1) if job['rows_total'] else None
+    return status
+
+@app.cli.command('compact-applications')
+def compact_applications_command():
+    """Drops the columns of deleted form fields from the applications table, in the foreground."""
+    conn = get_db_conn()
+    try:
+        job_id = compact_applications(conn)
+        if job_id is None:
+            print("No hidden columns to compact.")
+            return
+        job = get_compaction_status(conn)["job"]
+        print(f"Dropped {', '.join(job['columns'])}; {job['rows_copied']} row(s) copied.")
+    finally:
+        conn.close()
+
+def convert_application_storage(conn, mode):
+    """
+    Rewrites applications into 'document' or 'columns' storage (see application_storage.py) in one
+    transaction, keeping the core columns' constraints, and returns the number of rows converted.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        layout = get_storage_layout(conn)
+        if layout.document == (mode == 'document'):
+            raise ValueError(f"applications already uses {mode} storage.")
+        if get_hidden_columns(conn) or compaction_running(conn):
+            raise ValueError("Deleted fields are still being compacted; run `flask --app app compact-applications` first.")
+        fields = [field.name for field in get_form_validator(conn).fields]  # The live form's; draft fields have no storage yet
+        create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'applications'").fetchone()[0]
+
+        if mode == 'document':
+            moved = [col for col in fields if col in layout.columns and col not in CORE_FIELDS]
+            kept = [col for col in layout.columns if col not in moved]
+            definitions = [d for d in split_table_definitions(create_sql) if _definition_column(d) not in moved]
+            definitions.append(f"{DOCUMENT_COLUMN} TEXT NOT NULL DEFAULT '{{}}'")
+            definitions += [generated_column_definition(col) for col in moved if col in PROMOTED_COLUMNS]
+            insert_columns = kept + [DOCUMENT_COLUMN]
+            select_columns = [f'a."{col}"' for col in kept] + [document_sql(moved, 'a')]
+        else:
+            moved = [col for col in fields if col not in layout.columns]
+            kept = [col for col in layout.columns if col != DOCUMENT_COLUMN]
+            definitions = [d for d in split_table_definitions(create_sql) if _definition_column(d) not in layout.generated + [DOCUMENT_COLUMN]]
+            definitions += [f'"{col}" TEXT' for col in moved]
+            insert_columns = kept + moved
+            select_columns = [f'a."{col}"' for col in kept] + [layout.expression(col) for col in moved]
+
+        # Indexes on moved fields are recreated by ensure_application_indexes where the field still has a column
+        dependents = _dependent_sql(conn, moved + [DOCUMENT_COLUMN])
+        conn.execute(f"DROP TABLE IF EXISTS {COMPACTION_TABLE}")
+        conn.execute(f"CREATE TABLE {COMPACTION_TABLE} ({', '.join(definitions)})")
+        converted = conn.execute(f"""
+            INSERT INTO {COMPACTION_TABLE} ({', '.join(f'"{col}"' for col in insert_columns)})
+            SELECT {', '.join(select_columns)} FROM applications a ORDER BY a.id
+        """).rowcount
+        conn.execute("DROP TABLE applications")
+        conn.execute(f"ALTER TABLE {COMPACTION_TABLE} RENAME TO applications")
+        for sql in dependents:
+            conn.execute(sql)
+        ensure_application_indexes(conn.cursor())
+        bump_data_generation(conn)
+        conn.commit()
+        return converted
+    except Exception:
+        conn.rollback()
+        raise
+
+@app.cli.command('convert-storage')
+@click.argument('mode', type=click.Choice(['document', 'columns']))
+def convert_storage_command(mode):
+    """Converts the applications table to document or per-column storage."""
+    conn = get_db_conn()
+    try:
+        converted = convert_application_storage(conn, mode)
+    except ValueError as e:
+        print(e)
+        raise SystemExit(1)
+    finally:
+        conn.close()
+    print(f"Converted {converted} application(s) to {mode} storage.")
+
+# --- Group-commit Writer ---
+# Submissions are inserted by one writer thread. It takes every row already waiting, plus whatever
+# arrives within WRITER_FLUSH_MS of the first (up to WRITER_BATCH_SIZE rows), and commits them in one
+# transaction, so a burst pays one fsync and one write-lock acquisition per batch instead of per
+# applicant. Rows that arrive while a batch commits form the next one. Each row
+# runs in its own savepoint: a duplicate email rolls back only that row, and its caller gets the
+# IntegrityError while the rest of the batch commits.
+
+WRITER_BATCH_SIZE = int(os.environ.get('WRITER_BATCH_SIZE', 32))
+WRITER_FLUSH_MS = float(os.environ.get('WRITER_FLUSH_MS', 0))
+
+class ApplicationWriter:
+    """Single writer thread for application inserts; submit() returns a Future of the new application id."""
+
+    def __init__(self, batch_size, flush_seconds):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, row, idempotency_key=None):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='application-writer', daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((row, idempotency_key, future))
+        return future
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "average_batch": round(self.rows / self.batches, 2) if self.batches else None,
+            "queued": self._queue.qsize(),
+            "batch_size": self.batch_size,
+            "flush_ms": self.flush_seconds * 1000,
+        }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit(batch)
+            except Exception as e:
+                print(f"--- Application writer: batch of {len(batch)} failed ---\n{traceback.format_exc()}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch):
+        results = []
+        conn = get_db_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            layout = get_storage_layout(cursor)
+            for row, idempotency_key, future in batch:
+                cursor.execute("SAVEPOINT submission")
+                try:
+                    application_id = layout.insert(cursor, row)
+                    if idempotency_key:
+                        cursor.execute("INSERT INTO submission_receipts (idempotency_key, application_id) VALUES (?, ?)", (idempotency_key, application_id))
+                    record_application_rollups(cursor, row)
+                    record_pipeline_entries(cursor, [row])
+                    cursor.execute("RELEASE submission")
+                    results.append((future, application_id, None))
+                except sqlite3.Error as e:
+                    cursor.execute("ROLLBACK TO submission")
+                    cursor.execute("RELEASE submission")
+                    results.append((future, None, e))
+            if any(error is None for _, _, error in results):
+                bump_data_generation(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self.batches += 1
+        self.rows += len(batch)
+        # Callers are woken only once their row is durable
+        for future, application_id, error in results:
+            if error is None:
+                future.set_result(application_id)
+            else:
+                future.set_exception(error)
+
+application_writer = ApplicationWriter(WRITER_BATCH_SIZE, WRITER_FLUSH_MS / 1000)
+
+# --- Resume Storage Sweep ---
+# Identical resumes share one content-addressed file, so a submission that fails cannot tell whether
+# another one still being saved is about to reference its file. Failed submissions leave their file in
+# place, and this sweep deletes stored resumes that no application references once they have gone
+# unused (neither stored again nor adopted) for RESUME_SWEEP_GRACE_SECONDS.
+
+_resume_sweeper_lock = threading.Lock()
+_resume_sweeper = None
+
+def sweep_unused_resumes(conn, grace_seconds=RESUME_SWEEP_GRACE_SECONDS):
+    """Deletes stored resumes no application references that were last used over `grace_seconds` ago; returns the count."""
+    # Files are checked against the references read before the walk, so one referenced meanwhile is still recent
+    used_before = time.time() - grace_seconds
+    referenced = {row[0] for row in conn.execute("SELECT DISTINCT resume_path FROM applications WHERE resume_path IS NOT NULL")}
+    return sweep_orphans(app.config['UPLOAD_FOLDER'], referenced, used_before)
+
+@app.before_request
+def start_resume_sweeper():
+    # Started by the serving process rather than at import, so CLI commands and the debug reloader's watcher run no sweeps
+    global _resume_sweeper
+    with _resume_sweeper_lock:
+        if _resume_sweeper is not None:
+            return
+        def run():
+            while True:
+                time.sleep(RESUME_SWEEP_INTERVAL_SECONDS)
+                conn = get_db_conn()
+                try:
+                    removed = sweep_unused_resumes(conn)
+                    if removed:
+                        print(f"Resume sweep deleted {removed} unused file(s).")
+                except Exception:
+                    print(f"--- RESUME SWEEP ERROR ---\n{traceback.format_exc()}")
+                finally:
+                    conn.close()
+        _resume_sweeper = threading.Thread(target=run, name='resume-sweeper', daemon=True)
+        _resume_sweeper.start()
+
+@app.cli.command('sweep-resumes')
+@click.option('--grace-hours', type=float, default=RESUME_SWEEP_GRACE_SECONDS / 3600, show_default=True,
+              help='Only delete files unused for at least this long.')
+def sweep_resumes_command(grace_hours):
+    """Deletes stored resumes that no application references, in the foreground."""
+    conn = get_db_conn()
+    try:
+        removed = sweep_unused_resumes(conn, grace_hours * 3600)
+        print(f"Deleted {removed} unused resume file(s).")
+    finally:
+        conn.close()
+
+# --- Application Query Helpers ---
+
+def get_application_columns(conn):
+    """
+    Returns {column: SQL expression over `applications a`} for the fields that hold form answers, in
+    table order. In document storage the live form's fields without a column of their own follow in form order.
+    """
+    layout = get_storage_layout(conn)
+    hidden = get_hidden_columns(conn)
+    names = [col for col in layout.columns if col not in INTERNAL_COLUMNS and col != DOCUMENT_COLUMN]
+    if layout.document:
+        names += [field.name for field in get_form_validator(conn).fields if field.name not in names]
+    return {col: layout.expression(col) for col in names if col not in hidden}
+
+def get_table_columns(app_columns):
+    """Returns (all_columns, default_columns) for the responses table, with 'name' first."""
+    all_columns = list(app_columns) + ['Status']
+    if 'name' in all_columns:
+        all_columns.insert(0, all_columns.pop(all_columns.index('name')))
+    default_columns = [col for col in DEFAULT_TABLE_COLUMNS if col in all_columns]
+    return all_columns, default_columns
+
+def _normalize_timestamp(value):
+    """Formats a date filter the way submission_timestamp is stored so it can be compared as text."""
+    return pd.to_datetime(value).strftime('%Y-%m-%d %H:%M:%S')
+
+def build_filter_clause(args, app_columns):
+    """Turns dashboard filter arguments into parameterized conditions over `applications a`."""
+    conditions, params = [], []
+    if 'submission_timestamp' in app_columns:
+        if args.get('start_date'):
+            conditions.append("a.submission_timestamp >= ?")
+            params.append(_normalize_timestamp(args['start_date']))
+        if args.get('end_date'):
+            conditions.append("a.submission_timestamp <= ?")
+            params.append(_normalize_timestamp(args['end_date']))
+    for key, col in FILTER_COLUMNS.items():
+        value = args.get(key)
+        if value and value != 'all' and col in app_columns:
+            conditions.append(f'{app_columns[col]} = ?')
+            params.append(value)
+    return conditions, params
+
+def build_table_clause(args, app_columns):
+    """The dashboard filters plus the table's free-text search, as parameterized conditions."""
+    conditions, params = build_filter_clause(args, app_columns)
+    search = (args.get('search') or '').strip()
+    search_columns = [col for col in SEARCH_COLUMNS if col in app_columns]
+    if search and search_columns:
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append('(' + ' OR '.join(f'{app_columns[col]} LIKE ? ESCAPE \'\\\'' for col in search_columns) + ')')
+        params.extend([pattern] * len(search_columns))
+    return conditions, params
+
+def _encode_cursor(sort_value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode()
+
+def _decode_cursor(token):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid table cursor.")
+
+def fetch_table_page(conn, args):
+    """
+    Returns one page of the responses table plus the total number of matching rows.
+    Pages are keyset-paginated on (sort column, applications.id), so the cost of a page
+    does not depend on how deep into the result set it is.
+    """
+    app_columns = get_application_columns(conn)
+    all_columns, default_columns = get_table_columns(app_columns)
+
+    try:
+        page_size = int(args.get('page_size', TABLE_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("page_size must be an integer.")
+    page_size = max(1, min(page_size, TABLE_MAX_PAGE_SIZE))
+
+    sort = args.get('sort') or 'id'
+    if sort != 'id' and sort not in all_columns:
+        raise ValueError(f"Cannot sort by unknown column '{sort}'.")
+    direction = 'desc' if (args.get('direction') or 'asc').lower() == 'desc' else 'asc'
+
+    conditions, params = build_table_clause(args, app_columns)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    total = conn.execute(f"SELECT COUNT(*) FROM applications a {where_sql}", params).fetchone()[0]
+
+    if sort == 'id':
+        sort_expr = 'a.id'
+    elif sort == 'Status':
+        sort_expr = "COALESCE(s.status, 'Applied')"
+    else:
+        sort_expr = f"COALESCE({app_columns[sort]}, '')"
+
+    page_conditions, page_params = list(conditions), list(params)
+    if args.get('cursor'):
+        last_value, last_id = _decode_cursor(args['cursor'])
+        op = '>' if direction == 'asc' else '<'
+        if sort == 'id':
+            page_conditions.append(f"a.id {op} ?")
+            page_params.append(last_id)
+        else:
+            page_conditions.append(f"({sort_expr} {op} ? OR ({sort_expr} = ? AND a.id {op} ?))")
+            page_params.extend([last_value, last_value, last_id])
+
+    select_columns = ["lower(a.email) AS email" if col == 'email' else f'{expr} AS "{col}"' for col, expr in app_columns.items()]
+    select_columns += ["COALESCE(s.status, 'Applied') AS Status", f"{sort_expr} AS _sort_key"]
+    order_sql = f"a.id {direction}" if sort == 'id' else f"{sort_expr} {direction}, a.id {direction}"
+    page_where_sql = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ''
+    rows = conn.execute(f"""
+        SELECT {', '.join(select_columns)}
+        FROM applications a LEFT JOIN statuses s ON s.email = a.email_normalized
+        {page_where_sql}
+        ORDER BY {order_sql}
+        LIMIT ?
+    """, page_params + [page_size + 1]).fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = _encode_cursor(rows[-1]['_sort_key'], rows[-1]['id']) if has_more else None
+
+    return {
+        "rows": [{col: ('' if row[col] is None else row[col]) for col in all_columns} for row in rows],
+        "all_columns": all_columns, "default_columns": default_columns,
+        "total": total, "page_size": page_size, "next_cursor": next_cursor,
+        "sort": sort, "direction": direction
+    }
+
+# --- Conditional GET and Compression ---
+# Responses are sent through conditional_responses.py, shared with the form server; cached bodies
+# are kept per data generation below.
+
+class ResponseCache:
+    """
+    A bounded LRU of CachedBody entries. Keys start with the data generation read from the
+    database, so a write made by any worker process makes every older entry unreachable.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            if key[0] != self._generation:
+                # Entries from other generations can never be hit again
+                self._entries.clear()
+                self._generation = key[0]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+data_cache = ResponseCache(DATA_CACHE_SIZE)
+
+def _normalize_args(args):
+    """Orders the query arguments and drops the empty/'all' values that mean "no filter"."""
+    return tuple(sorted((key, value) for key, value in args.items(multi=True) if value not in ('', 'all')))
+
+def cached_json_response(conn, build):
+    """
+    Serves the current request from data_cache, calling build() to fill it on a miss. The ETag is
+    a hash of the body, so a client revalidating a piece that a write did not change gets a 304.
+    """
+    generation, updated_at = get_metadata_counter(conn, 'data_generation')
+    key = (generation, request.path, _normalize_args(request.args))
+    entry = data_cache.get(key)
+    if entry is None:
+        body = app.json.dumps(build())
+        entry = CachedBody(body, hashlib.sha1(body.encode()).hexdigest(), updated_at)
+        data_cache.put(key, entry)
+    return conditional_response(entry)
+
 # --- Web Routes ---
 
 @app.route('/')
@@ -254,153 +1573,647 @@ def route_logout():
     session.clear()
     return redirect(url_for('route_admin_login'))
 
-@app.route('/uploads/<filename>')
+@app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
 
 # --- API Endpoints ---
 
-@app.route('/api/data')
-def api_get_data():
+def compute_dimension_counts(conn, args, dimensions=None):
+    """
+    Returns (total, {dimension: {value: count}}) for the applications matching the dashboard
+    filters. 'Status' is always counted; `dimensions` limits which other columns are.
+    """
+    app_columns = get_application_columns(conn)
+    dimensions = [col for col in (ROLLUP_DIMENSIONS if dimensions is None else dimensions) if col in app_columns]
+    conditions, params = build_filter_clause(args, app_columns)
+    if not conditions:
+        # Unfiltered loads read the precomputed rollups instead of touching the applications.
+        rollups = read_rollups(conn)
+        counts = {dimension: rollups.get(dimension, {}) for dimension in ['Status'] + dimensions}
+        return sum(counts['Status'].values()), counts
+
+    # Filters are applied by SQLite through the column indexes, statuses are resolved by an
+    # indexed join on the normalized email, and only the columns being counted are read into pandas.
+    where_sql = f"WHERE {' AND '.join(conditions)}"
+    select_sql = ', '.join(["COALESCE(s.status, 'Applied') AS Status"] + [f'{app_columns[col]} AS "{col}"' for col in dimensions])
+    df = pd.read_sql_query(f"""
+        SELECT {select_sql}
+        FROM applications a LEFT JOIN statuses s ON s.email = a.email_normalized
+        {where_sql}
+    """, conn, params=params)
+    return len(df), {col: df[col].value_counts().to_dict() for col in ['Status'] + dimensions}
+
+def build_kpis(total, counts):
+    status_counts = counts[DASHBOARD_COLUMNS['STATUS']]
+    kpis = {
+        'applications': total, 'shortlisted': int(status_counts.get('Shortlisted', 0)),
+        'interviewed': int(status_counts.get('Interviewed', 0)), 'offered': int(status_counts.get('Offered', 0)),
+        'hired': int(status_counts.get('Hired', 0)), 'rejected': int(status_counts.get('Rejected', 0)),
+    }
+    kpis['acceptance_rate'] = round((kpis['hired'] / kpis['offered']) * 100 if kpis['offered'] > 0 else 0, 2)
+    kpis['rejection_rate'] = round((kpis['rejected'] / total) * 100 if total > 0 else 0, 2)
+    return kpis
+
+def build_chart(chart_name, kpis, counts):
+    if chart_name == 'recruitment_funnel':
+        return {'labels': ['Applications', 'Shortlisted', 'Interviewed', 'Offered', 'Hired'], 'data': [kpis['applications'], kpis['shortlisted'], kpis['interviewed'], kpis['offered'], kpis['hired']]}
+    return counts.get(CHART_DIMENSIONS[chart_name], {})
+
+def build_facets(counts):
+    """Plain sorted option lists, the `filters` shape of the combined /api/data response."""
+    return {key: sorted(counts.get(col, {}).keys()) for key, col in FACET_COLUMNS.items()}
+
+def parse_facet_args(args):
+    """Returns (facet keys, prefix, limit) from the facet request parameters."""
+    keys = [key for value in args.getlist('facet') for key in value.split(',') if key] or list(FACET_COLUMNS)
+    unknown = [key for key in keys if key not in FACET_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown facet(s): {', '.join(unknown)}")
+    try:
+        limit = int(args.get('limit', FACET_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("Invalid limit.")
+    if limit < 0:
+        raise ValueError("Invalid limit.")
+    return keys, (args.get('prefix') or '').strip(), limit
+
+def lookup_facet_values(conn, dimension, prefix='', limit=FACET_DEFAULT_LIMIT):
+    """Reads the top `limit` values of one dimension from the rollups, optionally those starting with `prefix`."""
+    query = "SELECT value, count FROM application_rollups WHERE dimension = ? AND count > 0"
+    params = [dimension]
+    if prefix:
+        # Case-insensitive range over the NOCASE index; U+10FFFF sorts after any character that can follow the prefix
+        query += " AND value >= ? COLLATE NOCASE AND value < ? COLLATE NOCASE"
+        params += [prefix, prefix + '\U0010ffff']
+    query += " ORDER BY count DESC, value"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return [{"value": row['value'], "count": row['count']} for row in conn.execute(query, params)]
+
+def build_facet_index(conn, args):
+    """
+    Returns {facet: [{value, count}]} ordered by count. Unfiltered requests read the rollups directly;
+    filtered ones count the matching rows first.
+    """
+    keys, prefix, limit = parse_facet_args(args)
+    dimensions = list(dict.fromkeys(FACET_COLUMNS[key] for key in keys))
+    if not build_filter_clause(args, get_application_columns(conn))[0]:
+        return {key: lookup_facet_values(conn, FACET_COLUMNS[key], prefix, limit) for key in keys}
+
+    _, counts = compute_dimension_counts(conn, args, dimensions=dimensions)
+    facets = {}
+    for key in keys:
+        values = [(str(value), int(count)) for value, count in counts.get(FACET_COLUMNS[key], {}).items()
+                  if str(value).lower().startswith(prefix.lower())]
+        values.sort(key=lambda item: (-item[1], item[0]))
+        facets[key] = [{"value": value, "count": count} for value, count in (values[:limit] if limit else values)]
+    return facets
+
+def build_dashboard_payload(conn, args):
+    """Computes the KPIs, charts, first table page and filter lists served by /api/data."""
+    if conn.execute("SELECT 1 FROM applications LIMIT 1").fetchone() is None:
+        return {"kpis": {}, "charts": {}, "table_data": [], "table": {}, "all_columns": [], "default_columns": [], "filters": {}}
+
+    total, counts = compute_dimension_counts(conn, args)
+    kpis = build_kpis(total, counts)
+    charts = {chart_name: build_chart(chart_name, kpis, counts) for chart_name in CHART_DIMENSIONS}
+
+    # Only the first page of the responses table is shipped; further pages come from /api/data/table
+    table_page = fetch_table_page(conn, args)
+    table_meta = {key: table_page[key] for key in ('total', 'page_size', 'next_cursor', 'sort', 'direction')}
+
+    return {"kpis": kpis, "charts": charts, "table_data": table_page['rows'], "table": table_meta, "all_columns": table_page['all_columns'], "default_columns": table_page['default_columns'], "filters": build_facets(counts)}
+
+def serve_dashboard_json(build):
+    """Runs an authenticated, cached dashboard read; build(conn, args) returns the JSON payload."""
     if 'user_id' not in session:
         return jsonify({"error": "Authentication required."}), 401
+    conn = get_db_conn()
     try:
-        conn = get_db_conn()
-        df = pd.read_sql_query("SELECT * FROM applications", conn)
-        if df.empty:
-            conn.close()
-            return jsonify({"kpis": {}, "charts": {}, "table_data": [], "all_columns": [], "default_columns": [], "filters": {}})
-
-        df['email'] = df['email'].astype(str).str.lower().fillna('')
-        statuses_df = pd.read_sql_query("SELECT lower(email) as email, status FROM statuses", conn)
+        return cached_json_response(conn, lambda: build(conn, request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"--- API ERROR in {request.path} ---\n{traceback.format_exc()}")
+        return jsonify({"error": "An error occurred on the server.", "message": str(e)}), 500
+    finally:
         conn.close()
 
-        status_map = {row['email']: row['status'] for _, row in statuses_df.iterrows()} if not statuses_df.empty else {}
-        df['Status'] = df.apply(lambda row: status_map.get(row.get('email', '').lower(), 'Applied'), axis=1)
+@app.route('/api/data')
+def api_get_data():
+    """Everything the dashboard shows in one response; kept for clients that predate the split endpoints."""
+    return serve_dashboard_json(build_dashboard_payload)
+
+@app.route('/api/data/kpis')
+def api_get_kpis():
+    def build(conn, args):
+        total, counts = compute_dimension_counts(conn, args, dimensions=[])
+        return build_kpis(total, counts)
+    return serve_dashboard_json(build)
+
+@app.route('/api/data/charts/<chart_name>')
+def api_get_chart(chart_name):
+    if chart_name not in CHART_DIMENSIONS:
+        return jsonify({"error": f"Unknown chart '{chart_name}'."}), 404
+    def build(conn, args):
+        dimension = CHART_DIMENSIONS[chart_name]
+        total, counts = compute_dimension_counts(conn, args, dimensions=[dimension] if dimension else [])
+        return build_chart(chart_name, build_kpis(total, counts), counts)
+    return serve_dashboard_json(build)
+
+@app.route('/api/data/facets')
+def api_get_facets():
+    """Filter dropdown options with counts; supports `facet`, `prefix` and `limit` for typeahead."""
+    return serve_dashboard_json(build_facet_index)
+
+@app.route('/api/data/table')
+def api_get_table_page():
+    """Returns one page of the responses table for the current filters, sort and search."""
+    return serve_dashboard_json(fetch_table_page)
+
+@app.route('/api/analytics/time-in-stage')
+def api_time_in_stage():
+    """Median, p90 and mean time applicants spent in each stage before moving on."""
+    return serve_dashboard_json(build_time_in_stage)
+
+@app.route('/api/analytics/conversion')
+def api_stage_conversion():
+    """Stage entries, advances and drop-outs per `interval`, optionally between `start_date` and `end_date`."""
+    return serve_dashboard_json(build_stage_conversion)
+
+@app.route('/api/analytics/funnel')
+def api_cohort_funnel():
+    """The recruitment funnel of everyone who applied, or per `by` (post, location or business_entity)."""
+    return serve_dashboard_json(build_cohort_funnel)
+
+# --- Data Export ---
+
+def open_export_cursor(conn, args):
+    """Returns (columns, cursor) over the applications matching the table filters and search, in id order."""
+    app_columns = get_application_columns(conn)
+    all_columns, _ = get_table_columns(app_columns)
+    columns = [col for value in args.getlist('columns') for col in value.split(',') if col] or all_columns
+    unknown = [col for col in columns if col not in all_columns]
+    if unknown:
+        raise ValueError(f"Unknown export column(s): {', '.join(unknown)}")
+
+    conditions, params = build_table_clause(args, app_columns)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    select_columns = ["COALESCE(s.status, 'Applied') AS Status" if col == 'Status' else "lower(a.email) AS email" if col == 'email' else f'{app_columns[col]} AS "{col}"' for col in columns]
+    cursor = conn.execute(f"""
+        SELECT {', '.join(select_columns)}
+        FROM applications a LEFT JOIN statuses s ON s.email = a.email_normalized
+        {where_sql}
+        ORDER BY a.id
+    """, params)
+    return columns, cursor
+
+def _iter_export_batches(cursor):
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+        if not rows:
+            return
+        yield rows
+
+def stream_csv_export(conn, columns, cursor):
+    """Yields the CSV one batch at a time; owns `conn` and closes it when the download ends."""
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in _iter_export_batches(cursor):
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        conn.close()
 
-        COLUMNS = {
-            'STATUS': 'Status', 'GENDER': 'gender', 'DATE': 'submission_timestamp', 'NAME': 'name',
-            'COMPANY': 'business_entity', 'COLLEGE': 'qualification_grad_school',
-            'LOCATION': 'location_of_position', 'POST': 'post_applying_for',
-            'QUALIFICATION': 'qualification_grad_course', 'COURSE': 'qualification_grad_course'
-        }
-        
-        filters_applied = {key: request.args.get(key) for key in request.args}
-        if COLUMNS['DATE'] in df.columns:
-            df[COLUMNS['DATE']] = pd.to_datetime(df[COLUMNS['DATE']], errors='coerce')
-            if filters_applied.get('start_date'):
-                df = df[df[COLUMNS['DATE']] >= pd.to_datetime(filters_applied['start_date'])]
-            if filters_applied.get('end_date'):
-                df = df[df[COLUMNS['DATE']] <= pd.to_datetime(filters_applied['end_date'])]
-
-        def apply_filter(dataframe, col_name, value):
-            if value and value != 'all' and col_name in dataframe.columns:
-                return dataframe[dataframe[col_name].astype(str) == value]
-            return dataframe
-
-        for key, col in [('location', COLUMNS['LOCATION']), ('post', COLUMNS['POST']), ('qualification', COLUMNS['QUALIFICATION']), ('business_entity', COLUMNS['COMPANY']), ('course', COLUMNS['COURSE']), ('college', COLUMNS['COLLEGE'])]:
-            df = apply_filter(df, col, filters_applied.get(key))
-        
-        status_counts = df[COLUMNS['STATUS']].value_counts()
-        kpis = {
-            'applications': len(df), 'shortlisted': int(status_counts.get('Shortlisted', 0)),
-            'interviewed': int(status_counts.get('Interviewed', 0)), 'offered': int(status_counts.get('Offered', 0)),
-            'hired': int(status_counts.get('Hired', 0)), 'rejected': int(status_counts.get('Rejected', 0)),
-        }
-        kpis['acceptance_rate'] = round((kpis['hired'] / kpis['offered']) * 100 if kpis['offered'] > 0 else 0, 2)
-        kpis['rejection_rate'] = round((kpis['rejected'] / len(df)) * 100 if len(df) > 0 else 0, 2)
-
-        charts = {
-            'apps_per_company': df[COLUMNS['COMPANY']].value_counts().to_dict() if COLUMNS['COMPANY'] in df.columns else {},
-            'apps_per_college': df[COLUMNS['COLLEGE']].value_counts().to_dict() if COLUMNS['COLLEGE'] in df.columns else {},
-            'gender_diversity': df[COLUMNS['GENDER']].value_counts().to_dict() if COLUMNS['GENDER'] in df.columns else {},
-            'recruitment_funnel': {'labels': ['Applications', 'Shortlisted', 'Interviewed', 'Offered', 'Hired'], 'data': [kpis['applications'], kpis['shortlisted'], kpis['interviewed'], kpis['offered'], kpis['hired']]}
-        }
+def write_xlsx_export(columns, cursor, path):
+    from openpyxl import Workbook
+    # Write-only workbooks flush rows to disk as they are appended
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Applications')
+    sheet.append(columns)
+    for rows in _iter_export_batches(cursor):
+        for row in rows:
+            sheet.append(list(row))
+    workbook.save(path)
+
+def write_parquet_export(columns, cursor, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([(col, pa.int64() if col == 'id' else pa.string()) for col in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in _iter_export_batches(cursor):
+            arrays = [
+                pa.array([row[i] if col == 'id' or row[i] is None else str(row[i]) for row in rows], type=schema.field(col).type)
+                for i, col in enumerate(columns)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
 
-        for col in df.columns:
-            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-        df.fillna('', inplace=True)
-        all_columns = df.columns.tolist()
-        if 'name' in all_columns:
-            all_columns.insert(0, all_columns.pop(all_columns.index('name')))
-        
-        default_columns = [col for col in ['name', 'email', 'post_applying_for', 'qualification_grad_school', 'Status', 'resume_path'] if col in all_columns]
-        table_data = df.to_dict(orient='records')
+def stream_file_and_remove(path):
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
 
-        def get_unique_values(col_name):
-            return sorted(df[col_name].dropna().unique().tolist()) if col_name in df.columns else []
-        
-        filters = {
-            'locations': get_unique_values(COLUMNS['LOCATION']), 'posts': get_unique_values(COLUMNS['POST']),
-            'qualifications': get_unique_values(COLUMNS['QUALIFICATION']), 'business_entities': get_unique_values(COLUMNS['COMPANY']),
-            'courses': get_unique_values(COLUMNS['COURSE']), 'colleges': get_unique_values(COLUMNS['COLLEGE'])
-        }
+@app.route('/api/data/export')
+def api_export_data():
+    """Downloads the filtered applications as CSV (streamed), XLSX or Parquet (written in batches)."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Authentication required."}), 401
+    export_format = (request.args.get('format') or 'csv').lower()
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({"error": f"Unsupported export format '{export_format}'."}), 400
 
-        return jsonify({"kpis": kpis, "charts": charts, "table_data": table_data, "all_columns": all_columns, "default_columns": default_columns, "filters": filters})
+    conn = get_db_conn()
+    try:
+        columns, cursor = open_export_cursor(conn, request.args)
+        filename = f"recruitment_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+        if export_format == 'csv':
+            return app.response_class(stream_csv_export(conn, columns, cursor), mimetype=EXPORT_MIMETYPES['csv'], headers=headers)
+
+        fd, path = tempfile.mkstemp(suffix=f'.{export_format}')
+        os.close(fd)
+        try:
+            if export_format == 'xlsx':
+                write_xlsx_export(columns, cursor, path)
+            else:
+                write_parquet_export(columns, cursor, path)
+        except Exception:
+            os.remove(path)
+            raise
+        conn.close()
+        return app.response_class(stream_file_and_remove(path), mimetype=EXPORT_MIMETYPES[export_format], headers=headers)
+    except ValueError as e:
+        conn.close()
+        return jsonify({"error": str(e)}), 400
+    except ImportError as e:
+        conn.close()
+        return jsonify({"error": f"{export_format.upper()} export is not available on this server.", "message": str(e)}), 501
     except Exception as e:
-        print(f"--- API ERROR in /api/data ---\n{traceback.format_exc()}")
+        conn.close()
+        print(f"--- API ERROR in /api/data/export ---\n{traceback.format_exc()}")
         return jsonify({"error": "An error occurred on the server.", "message": str(e)}), 500
 
 @app.route('/api/submit_application', methods=['POST'])
 def api_submit_application():
-    if 'cv-resume' not in request.files:
+    # The form server may hand over a resume it already stored in the shared upload folder instead of uploading it
+    resume_ref = request.form.get('resume_ref') if 'cv-resume' not in request.files else None
+    if resume_ref:
+        file = None
+    elif 'cv-resume' not in request.files:
         return jsonify({"error": "No resume file part"}), 400
-    
-    file = request.files['cv-resume']
-    if file.filename == '':
-        return jsonify({"error": "No selected file"}), 400
-
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # To avoid overwrites, prepend a unique identifier or use a better strategy
-        # For simplicity, we'll use email + original filename
-        email = request.form.get('email', 'unknown')
-        unique_filename = f"{secure_filename(email)}_{filename}"
-        
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
+    else:
+        file = request.files['cv-resume']
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+
+    if resume_ref or (file and allowed_file(file.filename)):
+        # Enforce the rules of the form version the applicant filled in before anything is written
+        conn = get_db_conn()
+        try:
+            form_version = resolve_form_version(conn, request.form.get('form_version'))
+            validator = get_form_validator(conn, form_version)
+            field_errors = validator.validate(request.form)
+        finally:
+            conn.close()
+        if field_errors:
+            return jsonify({"error": "Please correct the highlighted fields.", "fields": field_errors}), 400
+
+        # The form server's outbox retries deliveries under the same key; one that already succeeded is acknowledged again
+        idempotency_key = request.headers.get('Idempotency-Key')
+        conn = get_db_conn()
+        try:
+            delivered = idempotency_key and conn.execute("SELECT 1 FROM submission_receipts WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            registered = not delivered and conn.execute("SELECT 1 FROM applications WHERE email_normalized = ?",
+                                                        (normalize_email(request.form.get('email')),)).fetchone()
+        finally:
+            conn.close()
+        if delivered:
+            return jsonify({"success": True, "message": "Application submitted successfully.", "duplicate": True})
+        # Rejected before the resume is stored, so a duplicate leaves no file behind
+        if registered:
+            return jsonify({"error": f"An application with the email '{request.form.get('email')}' already exists."}), 409
+
+        # Streamed to disk under its content hash, so identical resumes are stored once and none is overwritten
+        try:
+            if resume_ref:
+                resume_path = adopt_reference(resume_ref, request.form.get('resume_token'), app.config['UPLOAD_FOLDER'], UPLOAD_HANDOFF_KEY)
+            else:
+                resume_path = store_upload(file.stream, app.config['UPLOAD_FOLDER'])
+        except UploadRejected as e:
+            return jsonify({"error": str(e)}), 400
 
         data = request.form.to_dict()
-        data['resume_path'] = unique_filename # Store the path to be saved in DB
+        data['resume_path'] = resume_path # Store the path to be saved in DB
+        data['email_normalized'] = normalize_email(data.get('email'))
+        data['form_version'] = form_version
         
         conn = get_db_conn()
         try:
-            form_fields = conn.execute("SELECT name FROM form_config").fetchall()
-            valid_columns = {field['name'] for field in form_fields}
-            valid_columns.add('resume_path') # Add resume_path to valid columns
-            
-            columns_to_insert = [col for col in data.keys() if col in valid_columns]
-            values_to_insert = [data[col] for col in columns_to_insert]
-            
-            if not columns_to_insert:
-                return jsonify({"error": "No valid data received."}), 400
+            # Fields of the submitted form version that still exist; answers to a field deleted since it was published are dropped
+            valid_columns = {field.name for field in validator.fields} & set(get_application_columns(conn))
+        finally:
+            conn.close()
+        valid_columns.add('resume_path') # Add resume_path to valid columns
+        valid_columns.add('email_normalized')
+        valid_columns.add('form_version')
 
-            placeholders = ', '.join(['?'] * len(columns_to_insert))
-            query = f"INSERT INTO applications ({', '.join(columns_to_insert)}) VALUES ({placeholders})"
-            
-            cursor = conn.cursor()
-            cursor.execute(query, values_to_insert)
-            conn.commit()
+        row = {col: value for col, value in data.items() if col in valid_columns}
+        if not row:
+            return jsonify({"error": "No valid data received."}), 400
+
+        # A resume whose application is not saved stays stored, since an identical upload still being saved may
+        # share the file; the resume sweep deletes it once no application references it
+        try:
+            # Committed together with the other submissions arriving at the same moment
+            application_writer.submit(row, idempotency_key).result()
             return jsonify({"success": True, "message": "Application submitted successfully."})
         except sqlite3.IntegrityError:
             return jsonify({"error": f"An application with the email '{data.get('email')}' already exists."}), 409
         except Exception as e:
             print(f"--- API ERROR in /api/submit_application ---\n{traceback.format_exc()}")
             return jsonify({"error": "An error occurred on the server.", "message": str(e)}), 500
-        finally:
-            conn.close()
     else:
         return jsonify({"error": "File type not allowed"}), 400
 
 
-# --- Form Configuration APIs ---
+# --- Bulk Import ---
+# Spreadsheets (CSV or XLSX) from offline campus drives are imported in a background job. Headers are
+# matched to form fields by name or label (or an explicit mapping), every row is checked against the
+# active form version's rules (file fields excepted, as imported applicants have no resume), and valid
+# rows are inserted with executemany, IMPORT_CHUNK_SIZE rows per transaction, together with their
+# rollup counts. Rows with errors or an email that is already registered (or repeated in the file)
+# are skipped and reported; progress is recorded in application_imports after every chunk.
+
+IMPORT_FORMATS = {'csv', 'xlsx'}
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_ERROR_LIMIT = 500  # row errors kept in the job record; the counts cover every row
+
+def _import_key(text):
+    return re.sub(r'[^a-z0-9]+', '_', str(text or '').strip().lower()).strip('_')
+
+def map_import_columns(headers, fields, overrides=None):
+    """Returns ({header index: field name}, [ignored headers]) matching headers to field names or labels."""
+    by_key = {}
+    for field in fields:
+        by_key.setdefault(_import_key(field['label']), field['name'])
+    for field in fields:
+        by_key[_import_key(field['name'])] = field['name']  # Names win over labels
+    names = {field['name'] for field in fields}
+    mapping, ignored = {}, []
+    for index, header in enumerate(headers):
+        header = str(header or '').strip()
+        if overrides and header in overrides:
+            target = overrides[header]
+            if target and target not in names:
+                raise ValueError(f"Column '{header}' is mapped to unknown field '{target}'.")
+        else:
+            target = by_key.get(_import_key(header))
+        if target and target not in mapping.values():
+            mapping[index] = target
+        elif header:
+            ignored.append(header)
+    return mapping, ignored
+
+def _is_blank_row(values):
+    return not any(str(value).strip() for value in values if value is not None)
+
+def iter_import_rows(path, import_format):
+    """Yields the header row, then every data row, of a CSV or XLSX file without loading it whole."""
+    if import_format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f)
+        return
+    from openpyxl import load_workbook
+    # Read-only workbooks stream rows from the file
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
 
-@app.route('/api/public/form-config', methods=['GET'])
-def get_public_form_config():
-    """A public endpoint to fetch the form structure for any applicant."""
+def count_import_rows(path, import_format):
+    """Data rows in the file, not counting blank lines, which the import skips too."""
+    rows = iter_import_rows(path, import_format)
+    next(rows, None)  # Header
+    return sum(1 for values in rows if not _is_blank_row(values))
+
+def _update_import(conn, job_id, **values):
+    conn.execute(f"UPDATE application_imports SET {', '.join(f'{column} = ?' for column in values)} WHERE id = ?",
+                 (*values.values(), job_id))
+    conn.commit()
+
+def _insert_import_chunk(conn, layout, names, rows):
+    """Inserts one chunk in a transaction; returns the rows skipped as already registered."""
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Checked under the write lock, so a submission arriving meanwhile cannot slip in between
+        emails = [row['email_normalized'] for _, row in rows]
+        registered = {r[0] for r in cursor.execute(
+            f"SELECT email_normalized FROM applications WHERE email_normalized IN ({', '.join('?' * len(emails))})", emails)}
+        new_rows = [(line, row) for line, row in rows if row['email_normalized'] not in registered]
+        skipped = [(line, row) for line, row in rows if row['email_normalized'] in registered]
+        if new_rows:
+            sql, to_params = layout.insert_statement(names)
+            cursor.executemany(sql, [to_params(row) for _, row in new_rows])
+            statuses = dict(cursor.execute(
+                f"SELECT email, status FROM statuses WHERE email IN ({', '.join('?' * len(new_rows))})",
+                [row['email_normalized'] for _, row in new_rows]).fetchall())
+            counts = defaultdict(int)
+            for _, row in new_rows:
+                counts[('Status', statuses.get(row['email_normalized'], 'Applied'))] += 1
+                for dimension in ROLLUP_DIMENSIONS:
+                    if row.get(dimension) is not None:
+                        counts[(dimension, str(row[dimension]))] += 1
+            cursor.executemany('''
+                INSERT INTO application_rollups (dimension, value, count) VALUES (?, ?, ?)
+                ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count
+            ''', [(dimension, value, count) for (dimension, value), count in counts.items()])
+            record_pipeline_entries(cursor, [row for _, row in new_rows])
+            bump_data_generation(cursor)
+        conn.commit()
+        return skipped
+    except Exception:
+        conn.rollback()
+        raise
+
+def run_import(job_id, path, import_format, overrides=None):
+    """Imports a spreadsheet into applications, recording progress and row errors in application_imports."""
     conn = get_db_conn()
-    
+    try:
+        _update_import(conn, job_id, status='running', rows_total=count_import_rows(path, import_format))
+        # Imported rows are checked against, and recorded as, the active form version, as a new submission would be
+        form_version = resolve_form_version(conn, None)
+        validator = get_form_validator(conn, form_version)
+        columns = set(get_application_columns(conn))
+        checks = [field for field in validator.fields if field.type != 'file' and field.name in columns]
+        layout = get_storage_layout(conn.cursor())
+
+        rows = iter_import_rows(path, import_format)
+        headers = next(rows, [])
+        mapping, ignored = map_import_columns(headers, [{'name': check.name, 'label': check.label} for check in checks], overrides)
+        if 'email' not in mapping.values():
+            raise ValueError("The file has no column for the applicant's email.")
+        _update_import(conn, job_id, mapping=json.dumps({"columns": {headers[i]: name for i, name in mapping.items()}, "ignored": ignored}))
+        names = list(mapping.values()) + ['email_normalized', 'form_version']
+
+        errors, seen = [], set()
+        processed = inserted = duplicates = invalid = 0
+        def report(line, row, message):
+            if len(errors) < IMPORT_ERROR_LIMIT:
+                errors.append({"row": line, "email": row.get('email'), **message})
+
+        chunk = []
+        def flush():
+            nonlocal inserted, duplicates
+            skipped = _insert_import_chunk(conn, layout, names, chunk) if chunk else []
+            for line, row in skipped:
+                report(line, row, {"duplicate": "An application with this email already exists."})
+            duplicates += len(skipped)
+            inserted += len(chunk) - len(skipped)
+            chunk.clear()
+            _update_import(conn, job_id, rows_processed=processed, inserted=inserted, duplicates=duplicates,
+                           invalid=invalid, errors=json.dumps(errors))
+
+        for line, values in enumerate(rows, start=2):  # Line 1 is the header
+            if _is_blank_row(values):
+                continue
+            row = {name: values[i].strip() if i < len(values) and values[i] is not None else '' for i, name in mapping.items()}
+            processed += 1
+            field_errors = {}
+            for check in checks:
+                message = check.validate(row.get(check.name))
+                if message:
+                    field_errors[check.name] = message
+            email = normalize_email(row.get('email'))
+            if field_errors:
+                invalid += 1
+                report(line, row, {"fields": field_errors})
+            elif email in seen:
+                duplicates += 1
+                report(line, row, {"duplicate": "This email appears earlier in the file."})
+            else:
+                seen.add(email)
+                row = {name: (value if value != '' else None) for name, value in row.items()}
+                row['email_normalized'] = email
+                row['form_version'] = form_version
+                chunk.append((line, row))
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+        flush()
+        _update_import(conn, job_id, status='completed', rows_total=processed, finished_at=datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+        return get_import_status(conn, job_id)
+    except Exception as e:
+        print(f"--- IMPORT ERROR (job {job_id}) ---\n{traceback.format_exc()}")
+        _update_import(conn, job_id, status='failed', error=str(e), finished_at=datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+        return get_import_status(conn, job_id)
+    finally:
+        conn.close()
+        os.remove(path)
+
+def get_import_status(conn, job_id):
+    job = conn.execute("SELECT * FROM application_imports WHERE id = ?", (job_id,)).fetchone()
+    if job is None:
+        return None
+    status = dict(job, mapping=json.loads(job['mapping']) if job['mapping'] else None, errors=json.loads(job['errors'] or '[]'))
+    status["progress"] = round(job['rows_processed'] / job['rows_total'] * 100, 1) if job['rows_total'] else None
+    return status
+
+def create_import_job(conn, filename, started_by):
+    cursor = conn.execute("INSERT INTO application_imports (filename, status, started_by) VALUES (?, 'queued', ?)", (filename, started_by))
+    conn.commit()
+    return cursor.lastrowid
+
+@app.route('/api/applications/import', methods=['POST'])
+def api_import_applications():
+    """Starts a background import of a CSV or XLSX file of applicants; returns the job to poll."""
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({"error": "No file provided."}), 400
+    import_format = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    if import_format not in IMPORT_FORMATS:
+        return jsonify({"error": "Only CSV and XLSX files can be imported."}), 400
+    try:
+        overrides = json.loads(request.form.get('mapping') or '{}')  # {header: field name, or null to skip}
+        if not isinstance(overrides, dict):
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "mapping must be a JSON object of column header to field name."}), 400
+
+    fd, path = tempfile.mkstemp(suffix=f'.{import_format}')
+    os.close(fd)
+    file.save(path)
+    conn = get_db_conn()
+    try:
+        job_id = create_import_job(conn, file.filename, session.get('user_email'))
+    except Exception as e:
+        os.remove(path)
+        print(f"--- API ERROR in /api/applications/import ---\n{traceback.format_exc()}")
+        return jsonify({"error": "An error occurred on the server.", "message": str(e)}), 500
+    finally:
+        conn.close()
+    threading.Thread(target=run_import, args=(job_id, path, import_format, overrides), name=f'import-{job_id}', daemon=True).start()
+    return jsonify({"import_id": job_id, "status_url": f"/api/applications/import/{job_id}"}), 202
+
+@app.route('/api/applications/import/<int:job_id>', methods=['GET'])
+def api_import_status(job_id):
+    """Progress, counts and row errors of a bulk import."""
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    conn = get_db_conn()
+    try:
+        status = get_import_status(conn, job_id)
+    finally:
+        conn.close()
+    if status is None:
+        return jsonify({"error": "Import not found."}), 404
+    return jsonify(status)
+
+@app.cli.command('import-applications')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_applications_command(path):
+    """Imports a CSV or XLSX file of applicants in the foreground."""
+    import_format = path.rsplit('.', 1)[-1].lower()
+    if import_format not in IMPORT_FORMATS:
+        print("Only CSV and XLSX files can be imported.")
+        raise SystemExit(1)
+    # run_import removes its input, so it works on a copy
+    fd, copy = tempfile.mkstemp(suffix=f'.{import_format}')
+    os.close(fd)
+    shutil.copy(path, copy)
+    conn = get_db_conn()
+    try:
+        job_id = create_import_job(conn, os.path.basename(path), 'cli')
+    finally:
+        conn.close()
+    status = run_import(job_id, copy, import_format)
+    if status['status'] != 'completed':
+        print(f"Import failed: {status['error']}")
+        raise SystemExit(1)
+    print(f"Imported {status['inserted']} of {status['rows_processed']} row(s); "
+          f"{status['duplicates']} duplicate(s), {status['invalid']} invalid.")
+    for error in status['errors'][:20]:
+        print(f"  row {error['row']}: {error.get('duplicate') or error.get('fields')}")
+
+# --- Form Configuration APIs ---
+
+def build_public_form_config(conn):
+    """Groups the form fields by subsection, in section order, for the applicant form."""
     # Get section order from form_sections table if it exists
     section_order = {}
     try:
@@ -410,7 +2223,6 @@ def get_public_form_config():
         pass  # Table doesn't exist yet
     
     fields_query = conn.execute("SELECT * FROM form_config ORDER BY field_order ASC").fetchall()
-    conn.close()
     
     # Group fields by subsection for easier rendering in the template
     subsections = defaultdict(list)
@@ -425,9 +2237,102 @@ def get_public_form_config():
         # Fallback: maintain the order of subsections based on the first field's order in each
         subsection_order = sorted(subsections.keys(), key=lambda k: subsections[k][0]['field_order'])
     
-    ordered_subsections = {k: subsections[k] for k in subsection_order}
-    
-    return jsonify(ordered_subsections)
+    return {k: subsections[k] for k in subsection_order}
+
+# Serialized published form versions with their compressed variants. A version never changes once
+# published, so entries are only ever evicted, never invalidated.
+form_config_cache = ResponseCache(4)
+
+def serve_form_version(conn, version_id, activated_at, cache_control):
+    etag = f"form-v{version_id}"
+    response = revalidate(etag, activated_at, cache_control=cache_control)
+    if response is None:
+        entry = form_config_cache.get((version_id,))
+        if entry is None:
+            row = conn.execute("SELECT config FROM form_versions WHERE id = ?", (version_id,)).fetchone()
+            if row is None:
+                return jsonify({"error": "Form version not found."}), 404
+            entry = CachedBody(row['config'], etag, activated_at)
+            form_config_cache.put((version_id,), entry)
+        response = conditional_response(entry, cache_control=cache_control)
+    # The applicant form sends this back as `form_version` with the submission
+    response.headers['X-Form-Version'] = str(version_id)
+    return response
+
+@app.route('/api/public/form-config', methods=['GET'])
+def get_public_form_config():
+    """A public endpoint to fetch the form structure for any applicant."""
+    conn = get_db_conn()
+    try:
+        # Draft edits do not reach applicants until they are published
+        version_id, activated_at = get_active_form_version(conn)
+        return serve_form_version(conn, version_id, activated_at, f'public, max-age={FORM_CONFIG_MAX_AGE}')
+    finally:
+        conn.close()
+
+@app.route('/api/public/form-config/<int:version_id>', methods=['GET'])
+def get_public_form_version(version_id):
+    """One published form version; its content never changes, so it may be cached indefinitely."""
+    conn = get_db_conn()
+    try:
+        return serve_form_version(conn, version_id, None, 'public, max-age=31536000, immutable')
+    finally:
+        conn.close()
+
+@app.route('/api/form/versions', methods=['GET'])
+def get_form_versions():
+    """Lists the published form versions, newest first, and whether the draft has unpublished changes."""
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    conn = get_db_conn()
+    try:
+        active_id = get_active_form_version(conn)[0]
+        draft_version = get_metadata_counter(conn, 'config_version')[0]
+        versions = [dict(row, active=row['id'] == active_id) for row in conn.execute(
+            "SELECT id, config_version, published_at, published_by FROM form_versions ORDER BY id DESC")]
+        latest = versions[0]['config_version'] if versions else None
+        return jsonify({"active": active_id, "unpublished_changes": latest != draft_version, "versions": versions})
+    finally:
+        conn.close()
+
+@app.route('/api/form/publish', methods=['POST'])
+def publish_form_config():
+    """Publishes the draft form configuration as a new version and serves it to applicants."""
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    conn = get_db_conn()
+    try:
+        version_id, hidden = publish_form_version(conn.cursor(), session.get('user_email'))
+        conn.commit()
+        if hidden:
+            start_compaction()
+        return jsonify({"success": True, "version": version_id, "message": f"Form version {version_id} is now live."})
+    except ValueError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        conn.rollback()
+        print(f"--- API ERROR in /api/form/publish ---\n{traceback.format_exc()}")
+        return jsonify({"error": "Server error while publishing the form.", "message": str(e)}), 500
+    finally:
+        conn.close()
+
+@app.route('/api/form/versions/<int:version_id>/activate', methods=['POST'])
+def activate_form_version_route(version_id):
+    """Serves an earlier published version again, e.g. to roll back a bad publish."""
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    conn = get_db_conn()
+    try:
+        if conn.execute("SELECT 1 FROM form_versions WHERE id = ?", (version_id,)).fetchone() is None:
+            return jsonify({"error": "Form version not found."}), 404
+        # Answers to fields the earlier version lacks are kept; the next publish hides the ones it drops
+        apply_form_version_schema(conn.cursor(), get_form_version_fields(conn, version_id), drop_unused=False)
+        activate_form_version(conn, version_id)
+        conn.commit()
+        return jsonify({"success": True, "version": version_id, "message": f"Form version {version_id} is now live."})
+    except ValueError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 409
+    finally:
+        conn.close()
 
 
 @app.route('/api/form/config', methods=['GET'])
@@ -455,27 +2360,29 @@ def add_form_field():
 
     conn = get_db_conn()
     try:
+        # A hidden column still holds the deleted field's answers
+        if field_name in get_hidden_columns(conn):
+            return jsonify({"error": f"A deleted field named '{field_name}' is still being cleaned up. Please try again once compaction finishes."}), 409
+
         # Get the highest field_order to append at the end
         cursor = conn.cursor()
         cursor.execute("SELECT MAX(field_order) as max_order FROM form_config")
         max_order = cursor.fetchone()['max_order'] or 0
         new_order = max_order + 1
 
-        # Add column to applications table
-        cursor.execute(f"ALTER TABLE applications ADD COLUMN {field_name} TEXT")
-        
+        # The column is added when a version with the field is published; the live version's own fields may be re-added
+        if get_storage_layout(cursor).has_column(field_name) and field_name not in get_form_version_fields(conn, get_active_form_version(conn)[0]):
+            return jsonify({"error": f"A column named '{field_name}' already exists in the database."}), 409
+
         # Insert into form_config
         cursor.execute(
             "INSERT INTO form_config (name, label, type, subsection, options, required, validations, field_order) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
             (field_name, field_label, field_type, subsection, options, required, validations, new_order)
         )
+        bump_data_generation(cursor)
+        bump_config_version(cursor)
         conn.commit()
         return jsonify({"success": True, "message": "Field added successfully."})
-    except sqlite3.OperationalError as e:
-        if 'duplicate column name' in str(e):
-            return jsonify({"error": f"A column named '{field_name}' already exists in the database."}), 409
-        else:
-            raise
     except sqlite3.IntegrityError:
         return jsonify({"error": f"A field with the name '{field_name}' already exists."}), 409
     except Exception as e:
@@ -533,6 +2440,8 @@ def update_form_field(field_id):
         
         query = f"UPDATE form_config SET {', '.join(update_fields)} WHERE id = ?"
         cursor.execute(query, update_values)
+        bump_data_generation(cursor)
+        bump_config_version(cursor)
         conn.commit()
         return jsonify({"success": True, "message": "Field updated successfully."})
     except Exception as e:
@@ -554,21 +2463,11 @@ def delete_form_field(field_id):
         if not field: return jsonify({"error": "Field not found."}), 404
         if field['is_core']: return jsonify({"error": "Core fields cannot be deleted."}), 400
 
-        field_name = field['name']
-        
+        # Draft only: the live version keeps collecting the field until a version without it is published
         cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(applications)")
-        columns_info = cursor.fetchall()
-        column_defs = [f"{c['name']} {c['type']}" for c in columns_info if c['name'] != field_name]
-        column_names = [c['name'] for c in columns_info if c['name'] != field_name]
-
-        cursor.execute("BEGIN TRANSACTION")
-        cursor.execute(f"CREATE TABLE applications_new ({', '.join(column_defs)})")
-        cursor.execute(f"INSERT INTO applications_new ({', '.join(column_names)}) SELECT {', '.join(column_names)} FROM applications")
-        cursor.execute("DROP TABLE applications")
-        cursor.execute("ALTER TABLE applications_new RENAME TO applications")
-        
         cursor.execute("DELETE FROM form_config WHERE id = ?", (field_id,))
+        bump_data_generation(cursor)
+        bump_config_version(cursor)
         conn.commit()
         return jsonify({"success": True, "message": "Field deleted successfully."})
     except Exception as e:
@@ -578,6 +2477,23 @@ def delete_form_field(field_id):
     finally:
         conn.close()
 
+@app.route('/api/health/db', methods=['GET'])
+def database_pool_health():
+    """Connection pool statistics of the databases this server has opened."""
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    return jsonify({"pools": pool_stats(), "writer": application_writer.stats()})
+
+@app.route('/api/form/compaction', methods=['GET', 'POST'])
+def form_compaction():
+    """Reports the progress of the applications compaction; POST starts one for any columns still hidden."""
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    started = start_compaction() if request.method == 'POST' else False
+    conn = get_db_conn()
+    try:
+        return jsonify({"started": started, **get_compaction_status(conn)})
+    finally:
+        conn.close()
+
 @app.route('/api/form/config/reorder', methods=['POST'])
 def reorder_form_fields():
     if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
@@ -588,6 +2504,8 @@ def reorder_form_fields():
         cursor = conn.cursor()
         for field_id, new_order in field_orders:
             cursor.execute("UPDATE form_config SET field_order = ? WHERE id = ?", (new_order, field_id))
+        bump_data_generation(cursor)
+        bump_config_version(cursor)
         conn.commit()
         return jsonify({"success": True, "message": "Field order updated successfully."})
     except Exception as e:
@@ -660,6 +2578,8 @@ def create_form_section():
             INSERT INTO form_sections (name, section_order, description, icon)
             VALUES (?, ?, ?, ?)
         """, (name, next_order, description, icon))
+        bump_data_generation(conn)
+        bump_config_version(conn)
         
         conn.commit()
         return jsonify({"success": True, "message": "Section created successfully."})
@@ -720,6 +2640,8 @@ def update_form_section(section_name):
                 SET subsection = ?
                 WHERE subsection = ?
             """, (new_name, section_name))
+        bump_data_generation(conn)
+        bump_config_version(conn)
         
         conn.commit()
         return jsonify({"success": True, "message": "Section updated successfully."})
@@ -749,6 +2671,8 @@ def delete_form_section(section_name):
             conn.execute("DELETE FROM form_sections WHERE name = ?", (section_name,))
         except:
             pass  # Table might not exist
+        bump_data_generation(conn)
+        bump_config_version(conn)
         
         conn.commit()
         return jsonify({"success": True, "message": "Section deleted successfully."})
@@ -806,6 +2730,8 @@ def reorder_form_sections():
                     INSERT INTO form_sections (name, section_order, icon, description)
                     VALUES (?, ?, 'folder', '')
                 """, (section_name, order + 1))
+        bump_data_generation(cursor)
+        bump_config_version(cursor)
         
         conn.commit()
         print("--- REORDER COMPLETE ---")
@@ -838,6 +2764,8 @@ def bulk_update_fields():
                     SET required = ?, field_order = ?
                     WHERE id = ?
                 """, (update.get('required', False), update.get('field_order', 0), field_id))
+        bump_data_generation(cursor)
+        bump_config_version(cursor)
         conn.commit()
         return jsonify({"success": True, "message": "Fields updated successfully."})
     except Exception as e:
@@ -885,12 +2813,136 @@ def api_update_status():
     data = request.json
     email, name, status = data.get('email'), data.get('name'), data.get('status')
     if not email or not status: return jsonify({"error": "Email and status are required."}), 400
+    email = normalize_email(email)
     conn = get_db_conn()
-    conn.execute("INSERT OR REPLACE INTO statuses (email, name, status) VALUES (?, ?, ?)", (email.lower(), name, status))
+    cursor = conn.cursor()
+    current = cursor.execute("SELECT status FROM statuses WHERE email = ?", (email,)).fetchone()
+    old_status = current[0] if current else 'Applied'
+    record_status_rollups(cursor, email, status)
+    cursor.execute("INSERT OR REPLACE INTO statuses (email, name, status) VALUES (?, ?, ?)", (email, name, status))
+    if old_status != status:
+        changed_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute("INSERT INTO status_history (email, from_status, to_status, changed_by, changed_at) VALUES (?, ?, ?, ?, ?)",
+                       (email, old_status, status, session.get('user_email'), changed_at))
+        record_stage_transitions(cursor, [(email, old_status, status)], changed_at)
+    bump_data_generation(cursor)
     conn.commit()
     conn.close()
     return jsonify({"success": True})
 
+def transition_statuses(conn, conditions, params, new_status, actor):
+    """
+    Moves every applicant matching `conditions` (over `applications a` joined to `statuses s`) to
+    new_status in one transaction, updating the Status rollups and pipeline analytics and appending
+    each change to status_history. Returns (matched, changed) counts of applicants.
+    """
+    name_sql = get_application_columns(conn).get('name', 'NULL')
+    cursor = conn.cursor()
+    # Per connection, and emptied before every commit, so pooled connections never see stale targets
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS status_targets (email TEXT PRIMARY KEY, name TEXT, old_status TEXT NOT NULL, applications INTEGER NOT NULL)")
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(f"""
+            INSERT INTO temp.status_targets (email, name, old_status, applications)
+            SELECT a.email_normalized, MAX({name_sql}), COALESCE(s.status, 'Applied'), COUNT(*)
+            FROM applications a LEFT JOIN statuses s ON s.email = a.email_normalized
+            WHERE a.email_normalized IS NOT NULL AND {' AND '.join(conditions)}
+            GROUP BY a.email_normalized
+        """, params)
+        matched = cursor.rowcount
+        cursor.execute("DELETE FROM temp.status_targets WHERE old_status = ?", (new_status,))
+        changed = matched - cursor.rowcount
+
+        moved = cursor.execute("SELECT old_status, SUM(applications) FROM temp.status_targets GROUP BY old_status").fetchall()
+        for old_status, count in moved:
+            bump_rollup(cursor, 'Status', old_status, -count)
+            bump_rollup(cursor, 'Status', new_status, count)
+        changed_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute('''
+            INSERT INTO status_history (email, from_status, to_status, changed_by, changed_at)
+            SELECT email, old_status, ?, ?, ? FROM temp.status_targets ORDER BY email
+        ''', (new_status, actor, changed_at))
+        transitions = [(row[0], row[1], new_status) for row in cursor.execute("SELECT email, old_status FROM temp.status_targets ORDER BY email").fetchall()]
+        record_stage_transitions(cursor, transitions, changed_at)
+        cursor.execute('''
+            INSERT INTO statuses (email, name, status) SELECT email, name, ? FROM temp.status_targets WHERE true
+            ON CONFLICT(email) DO UPDATE SET status = excluded.status, name = COALESCE(excluded.name, statuses.name)
+        ''', (new_status,))
+        cursor.execute("DELETE FROM temp.status_targets")
+        if changed:
+            bump_data_generation(cursor)
+        conn.commit()
+        return matched, changed
+    except Exception:
+        conn.rollback()
+        raise
+
+@app.route('/api/applications/status', methods=['POST'])
+def api_bulk_update_status():
+    """
+    Sets one status on many applicants: those in `emails`, or those matching `filters` (the /api/data
+    filters plus the table search). `from_status` limits the move to applicants currently in that status.
+    """
+    if session.get('user_role') != 'admin': return jsonify({"error": "Admin access required."}), 403
+    data = request.get_json(silent=True) or {}
+    status, emails, filters, from_status = data.get('status'), data.get('emails'), data.get('filters'), data.get('from_status')
+    if not status or not isinstance(status, str):
+        return jsonify({"error": "Status is required."}), 400
+    if (emails is None) == (filters is None):
+        return jsonify({"error": "Provide either emails or filters."}), 400
+    if emails is not None and not (isinstance(emails, list) and all(isinstance(email, str) for email in emails)):
+        return jsonify({"error": "emails must be a list of email addresses."}), 400
+    if filters is not None and not isinstance(filters, dict):
+        return jsonify({"error": "filters must be an object of dashboard filters."}), 400
+
+    conn = get_db_conn()
+    try:
+        not_found = []
+        if emails is not None:
+            emails = json.dumps(sorted({normalize_email(email) for email in emails if email.strip()}))
+            conditions, params = ["a.email_normalized IN (SELECT value FROM json_each(?))"], [emails]
+            not_found = [row[0] for row in conn.execute('''
+                SELECT j.value FROM json_each(?) j
+                WHERE NOT EXISTS (SELECT 1 FROM applications a WHERE a.email_normalized = j.value)
+            ''', (emails,))]
+        else:
+            conditions, params = build_table_clause({key: str(value) for key, value in filters.items() if value is not None}, get_application_columns(conn))
+            if not conditions:
+                return jsonify({"error": "Choose the applicants with at least one filter."}), 400
+        if from_status:
+            conditions.append("COALESCE(s.status, 'Applied') = ?")
+            params.append(from_status)
+
+        matched, changed = transition_statuses(conn, conditions, params, status, session.get('user_email'))
+        return jsonify({"success": True, "status": status, "matched": matched, "updated": changed,
+                        "unchanged": matched - changed, "not_found": not_found})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"--- API ERROR in /api/applications/status ---\n{traceback.format_exc()}")
+        return jsonify({"error": "An error occurred on the server.", "message": str(e)}), 500
+    finally:
+        conn.close()
+
+@app.route('/api/applications/status/history', methods=['GET'])
+def api_status_history():
+    """Status transitions, newest first; of one applicant with `email`, else of everyone."""
+    if 'user_id' not in session: return jsonify({"error": "Authentication required."}), 401
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "Invalid limit."}), 400
+    query, params = "SELECT email, from_status, to_status, changed_by, changed_at FROM status_history", []
+    if request.args.get('email'):
+        query += " WHERE email = ?"
+        params.append(normalize_email(request.args['email']))
+    conn = get_db_conn()
+    try:
+        rows = conn.execute(query + " ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+    finally:
+        conn.close()
+    return jsonify([dict(row) for row in rows])
+
 
 # --- Main Execution ---
 if __name__ == '__main__':
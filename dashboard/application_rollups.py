@@ -0,0 +1,111 @@
+"""
+Counters kept in the database alongside the applications, shared by every write path.
+
+application_rollups holds one counter per (dimension, value): 'Status' counts applications by their
+resolved status and every ROLLUP_DIMENSIONS column counts its non-NULL values. app_metadata holds
+generation counters such as data_generation, which every write to applications, statuses or the form
+config bumps so cached dashboard responses go stale. A new applicant also enters the pipeline
+analytics at 'Applied'. The dashboard and the form server's direct database fallback both update them
+through this module, in the same transaction as their change, so the two servers can never count
+differently.
+"""
+
+from collections import defaultdict
+
+# Columns whose per-value application counts are kept in application_rollups, alongside 'Status'
+ROLLUP_DIMENSIONS = ['business_entity', 'qualification_grad_school', 'gender', 'location_of_position', 'post_applying_for', 'qualification_grad_course']
+# Groupings of the cohort funnels (the /api/data filter name and its column)
+COHORT_DIMENSIONS = {'post': 'post_applying_for', 'location': 'location_of_position', 'business_entity': 'business_entity'}
+FUNNEL_COHORT_ALL = ('all', 'all')  # funnel_reach key of the funnel over every applicant
+
+
+def normalize_email(email):
+    """The key applications and statuses are joined on."""
+    return (email or '').strip().lower()
+
+
+def get_metadata_counter(conn, key):
+    """Returns (value, updated_at) of an app_metadata counter, or (0, None) before its first bump."""
+    row = conn.execute("SELECT value, updated_at FROM app_metadata WHERE key = ?", (key,)).fetchone()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def bump_metadata_counter(cursor, key):
+    cursor.execute('''
+        INSERT INTO app_metadata (key, value, updated_at) VALUES (?, 1, CAST(strftime('%s', 'now') AS INTEGER))
+        ON CONFLICT(key) DO UPDATE SET value = value + 1, updated_at = excluded.updated_at
+    ''', (key,))
+
+
+def bump_data_generation(cursor):
+    """Marks cached dashboard responses as stale, in every worker process sharing the database."""
+    bump_metadata_counter(cursor, 'data_generation')
+
+
+def bump_rollup(cursor, dimension, value, delta):
+    if value is None or delta == 0:
+        return
+    cursor.execute('''
+        INSERT INTO application_rollups (dimension, value, count) VALUES (?, ?, ?)
+        ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count
+    ''', (dimension, str(value), delta))
+    cursor.execute("DELETE FROM application_rollups WHERE dimension = ? AND value = ? AND count <= 0", (dimension, str(value)))
+
+
+def record_application_rollups(cursor, row, delta=1):
+    """Adds one application row to the rollup counters (or removes it with delta=-1)."""
+    email = normalize_email(row.get('email'))
+    status = cursor.execute("SELECT status FROM statuses WHERE email = ?", (email,)).fetchone()
+    bump_rollup(cursor, 'Status', status[0] if status else 'Applied', delta)
+    for dimension in ROLLUP_DIMENSIONS:
+        bump_rollup(cursor, dimension, row.get(dimension), delta)
+
+
+def record_status_rollups(cursor, email, new_status):
+    """Moves the applications with this email from their current status counter to new_status."""
+    email = normalize_email(email)
+    matching = cursor.execute("SELECT COUNT(*) FROM applications WHERE email_normalized = ?", (email,)).fetchone()[0]
+    if not matching:
+        return
+    current = cursor.execute("SELECT status FROM statuses WHERE email = ?", (email,)).fetchone()
+    old_status = current[0] if current else 'Applied'
+    if old_status != new_status:
+        bump_rollup(cursor, 'Status', old_status, -matching)
+        bump_rollup(cursor, 'Status', new_status, matching)
+
+
+def record_pipeline_entries(cursor, rows):
+    """
+    Enters the applicants of newly inserted application rows into the pipeline analytics at 'Applied',
+    as of their submission: their pipeline_state, the day's entries into 'Applied' and the funnels
+    they count towards. An applicant already in the pipeline is not entered again.
+    """
+    columns = list(COHORT_DIMENSIONS.values())
+    flow, reach = defaultdict(int), defaultdict(int)
+    for row in rows:
+        email = normalize_email(row.get('email'))
+        if not email:
+            continue
+        cohorts = [row.get(col) for col in columns]
+        entered = cursor.execute(f'''
+            INSERT OR IGNORE INTO pipeline_state (email, stage, entered_at, furthest, {', '.join(columns)})
+            SELECT ?, 'Applied', MIN(submission_timestamp), 0, {', '.join('?' * len(columns))}
+            FROM applications WHERE email_normalized = ?
+            RETURNING entered_at
+        ''', (email, *cohorts, email)).fetchone()
+        if entered is None:
+            continue
+        if entered[0]:
+            flow[entered[0][:10]] += 1
+        reach[FUNNEL_COHORT_ALL] += 1
+        for col, value in zip(columns, cohorts):
+            if value is not None:
+                reach[(col, str(value))] += 1
+    cursor.executemany('''
+        INSERT INTO stage_flow (period, stage, entered) VALUES (?, 'Applied', ?)
+        ON CONFLICT(period, stage) DO UPDATE SET entered = entered + excluded.entered
+    ''', list(flow.items()))
+    cursor.executemany('''
+        INSERT INTO funnel_reach (dimension, value, stage, count) VALUES (?, ?, 'Applied', ?)
+        ON CONFLICT(dimension, value, stage) DO UPDATE SET count = count + excluded.count
+    ''', [(*key, count) for key, count in reach.items()])
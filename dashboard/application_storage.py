@@ -0,0 +1,82 @@
+"""
+Storage layouts of the applications table.
+
+In the default 'columns' layout every form field is a TEXT column of applications. In the 'document'
+layout the answers live in one JSON column, `answers`, and only the fields the dashboard filters and
+aggregates on are promoted to generated columns over it, which can be indexed. Adding a field is then
+a form_config insert with no ALTER TABLE, and scans read narrow rows. The layout is read from the
+schema (applications has an `answers` column in document mode), so both backends agree on it without
+extra configuration. `flask --app app convert-storage` converts a database in either direction.
+"""
+
+import json
+
+DOCUMENT_COLUMN = 'answers'
+# json_object() takes two arguments per key and SQLite caps function arguments at 127 by default
+DOCUMENT_KEYS_PER_OBJECT = 60
+
+
+def json_path(name):
+    return f'$."{name}"'
+
+
+def generated_column_definition(name):
+    """Column definition of a field promoted out of the answers document."""
+    return f'"{name}" TEXT GENERATED ALWAYS AS (json_extract({DOCUMENT_COLUMN}, \'{json_path(name)}\')) VIRTUAL'
+
+
+def document_sql(names, alias):
+    """SQL building the answers document from the columns `names` of `alias`, leaving out NULLs."""
+    sql = "'{}'"
+    for start in range(0, len(names), DOCUMENT_KEYS_PER_OBJECT):
+        pairs = ', '.join(f"'{name}', {alias}.\"{name}\"" for name in names[start:start + DOCUMENT_KEYS_PER_OBJECT])
+        # json_patch() drops the keys whose value is null
+        sql = f"json_patch({sql}, json_object({pairs}))"
+    return sql
+
+
+class StorageLayout:
+    """The stored and generated columns of applications, and how form answers are read and written through them."""
+
+    def __init__(self, columns, generated):
+        self.columns = columns
+        self.generated = generated
+        self.document = DOCUMENT_COLUMN in columns
+
+    def has_column(self, name):
+        return name in self.columns or name in self.generated
+
+    def expression(self, name, alias='a'):
+        """SQL reading one field; fields without a column of their own come from the answers document."""
+        if self.document and not self.has_column(name):
+            return f"json_extract({alias}.{DOCUMENT_COLUMN}, '{json_path(name)}')"
+        return f'{alias}."{name}"'
+
+    def insert_statement(self, names):
+        """Returns (sql, to_params) inserting rows keyed by `names`; to_params(row) gives one row's parameters."""
+        if not self.document:
+            direct, answers = list(names), []
+        else:
+            direct = [name for name in names if name in self.columns and name != DOCUMENT_COLUMN]
+            answers = [name for name in names if name not in direct]
+        insert_columns = direct + ([DOCUMENT_COLUMN] if self.document else [])
+        sql = f"INSERT INTO applications ({', '.join(insert_columns)}) VALUES ({', '.join(['?'] * len(insert_columns))})"
+
+        def to_params(row):
+            params = [row.get(name) for name in direct]
+            if self.document:
+                params.append(json.dumps({name: row[name] for name in answers if row.get(name) is not None}))
+            return params
+        return sql, to_params
+
+    def insert(self, cursor, row):
+        """Inserts one application and returns its id."""
+        sql, to_params = self.insert_statement(list(row))
+        return cursor.execute(sql, to_params(row)).lastrowid
+
+
+def get_storage_layout(cursor):
+    """Reads the current layout from the applications schema."""
+    info = cursor.execute("PRAGMA table_xinfo(applications)").fetchall()
+    # table_xinfo's last column is 0 for stored columns and 2 or 3 for generated ones
+    return StorageLayout([row[1] for row in info if row[6] == 0], [row[1] for row in info if row[6] in (2, 3)])
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Repeatable benchmark for the dashboard's read and write paths.
+
+Works on a throwaway copy of the given database (seed one with seed_data.py first) and drives the
+endpoints through the Flask test client, so no server needs to be running. Latency percentiles,
+peak memory and rows per second for every scenario are written to a JSON file that can be diffed
+between runs. Run from the dashboard directory:
+
+    python seed_data.py --applications 100000 --database recruitment_seed.db
+    python benchmark.py --database recruitment_seed.db --output benchmark_results.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import app as dashboard
+import seed_data
+
+# Smallest file that passes the PDF upload check
+SAMPLE_PDF = b"%PDF-1.4\n1 0 obj << /Type /Catalog >> endobj\ntrailer << /Root 1 0 R >>\n%%EOF\n"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies, rows_per_op, peak_bytes):
+    total = sum(latencies)
+    return {
+        "iterations": len(latencies),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 3),
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p90": round(percentile(latencies, 90) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        },
+        "peak_memory_kb": round(peak_bytes / 1024, 1),
+        "rows_per_second": round(rows_per_op * len(latencies) / total, 1) if total else None,
+    }
+
+
+def run_scenario(name, iterations, operation, rows_per_op, setup=None):
+    """
+    Times `iterations` calls of operation(i), each after an untimed setup(i), then repeats one call
+    under tracemalloc for peak memory so the tracing overhead never skews the latencies.
+    """
+    latencies = []
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        started = time.perf_counter()
+        response = operation(i)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name} failed with HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    if setup:
+        setup(iterations)
+    tracemalloc.start()
+    operation(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = summarize(latencies, rows_per_op(), peak)
+    print(f"{name:<28} p50 {result['latency_ms']['p50']:>10.2f} ms   p95 {result['latency_ms']['p95']:>10.2f} ms   "
+          f"peak {result['peak_memory_kb']:>10.1f} KB")
+    return result
+
+
+def wait_for_compaction():
+    while dashboard._compaction_lock.locked():
+        time.sleep(0.01)
+
+
+def run_benchmarks(client, iterations, write_iterations, concurrency):
+    conn = dashboard.get_db_conn()
+    try:
+        application_count = lambda: conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+        field_count = conn.execute("SELECT COUNT(*) FROM form_config").fetchone()[0]
+        top_location = conn.execute("""
+            SELECT location_of_position FROM applications WHERE location_of_position IS NOT NULL
+            GROUP BY location_of_position ORDER BY COUNT(*) DESC LIMIT 1
+        """).fetchone()
+        filtered_query = f"?location={top_location[0]}" if top_location else ''
+        results = {}
+
+        # Cold runs clear the response cache first, so they measure the query path rather than the cache
+        clear_cache = lambda i: dashboard.data_cache.clear()
+        results['dashboard_data_cold'] = run_scenario(
+            'dashboard_data_cold', iterations, lambda i: client.get('/api/data'), application_count, setup=clear_cache)
+        results['dashboard_data_warm'] = run_scenario(
+            'dashboard_data_warm', iterations, lambda i: client.get('/api/data'), application_count)
+        results['dashboard_data_filtered'] = run_scenario(
+            'dashboard_data_filtered', iterations, lambda i: client.get(f'/api/data{filtered_query}'), application_count, setup=clear_cache)
+        results['public_form_config'] = run_scenario(
+            'public_form_config', iterations, lambda i: client.get('/api/public/form-config'), lambda: field_count)
+
+        run_id = int(time.time())
+        # Complete answers for every configured field, so submissions pass server-side validation
+        fields = [dict(row) for row in conn.execute("SELECT name, label, type, options FROM form_config")]
+        rng = random.Random(run_id)
+        def submit(i):
+            form = {field['name']: seed_data.generate_value(rng, field, i, ('Benchmark', 'Applicant')) for field in fields}
+            form['email'] = f'benchmark.{run_id}.{i}@example.com'
+            form['cv-resume'] = (io.BytesIO(SAMPLE_PDF), f'resume_{i}.pdf')
+            return client.post('/api/submit_application', data=form, content_type='multipart/form-data')
+        results['submit_application'] = run_scenario('submit_application', iterations, submit, lambda: 1)
+
+        # A burst of simultaneous applicants, which the group-commit writer folds into few transactions
+        pool = ThreadPoolExecutor(concurrency)
+        def submit_burst(i):
+            responses = list(pool.map(submit, range((i + 1) * 100000, (i + 1) * 100000 + concurrency)))
+            return max(responses, key=lambda response: response.status_code)
+        results['submit_application_concurrent'] = run_scenario(
+            'submit_application_concurrent', iterations, submit_burst, lambda: concurrency)
+        pool.shutdown()
+
+        # Field edits change only the draft; the schema follows on publish. Publishing a version without a
+        # field hides its column, and the background compaction that drops it must finish before the next
+        # field's column is added, so waiting for it and publishing the new field are the untimed setup
+        field_ids = {}
+        def publish():
+            response = client.post('/api/form/publish')
+            if response.status_code >= 400:
+                raise RuntimeError(f"Could not publish: {response.get_data(as_text=True)[:200]}")
+            return response
+        def add_field(i):
+            wait_for_compaction()
+            name = f'benchmark_field_{run_id}_{i}'
+            response = client.post('/api/form/config', json={'label': name, 'name': name, 'type': 'text', 'subsection': 'Benchmark'})
+            if response.status_code >= 400:
+                raise RuntimeError(f"Could not add {name}: {response.get_data(as_text=True)[:200]}")
+            field_ids[i] = conn.execute("SELECT id FROM form_config WHERE name = ?", (name,)).fetchone()[0]
+            publish()
+        def delete_and_publish(i):
+            client.delete(f'/api/form/config/{field_ids[i]}')
+            return publish()
+        results['delete_form_field_publish'] = run_scenario(
+            'delete_form_field_publish', write_iterations, delete_and_publish, application_count, setup=add_field)
+        wait_for_compaction()
+        return results, application_count(), field_count
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard endpoints against a copy of a database.")
+    parser.add_argument('--database', default='recruitment_seed.db', help="Database to benchmark; it is copied, never modified (default recruitment_seed.db)")
+    parser.add_argument('--iterations', type=int, default=50, help="Timed requests per read/submit scenario (default 50)")
+    parser.add_argument('--write-iterations', type=int, default=5, help="Timed field deletions, each published (default 5)")
+    parser.add_argument('--concurrency', type=int, default=16, help="Simultaneous submissions per burst (default 16)")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON report (default benchmark_results.json)")
+    args = parser.parse_args()
+
+    source = os.path.abspath(args.database)
+    output = os.path.abspath(args.output)
+    workdir = tempfile.mkdtemp(prefix='dashboard-benchmark-')
+    cwd = os.getcwd()
+    try:
+        shutil.copy(source, os.path.join(workdir, 'benchmark.db'))
+        os.chdir(workdir)
+        os.makedirs(dashboard.UPLOAD_FOLDER, exist_ok=True)
+        dashboard.DATABASE = 'benchmark.db'
+        dashboard.init_db()
+
+        dashboard.app.config['TESTING'] = True
+        client = dashboard.app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'], sess['user_email'], sess['user_role'] = 0, 'benchmark@example.com', 'admin'
+
+        results, applications, fields = run_benchmarks(client, args.iterations, args.write_iterations, args.concurrency)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "database": {"source": args.database, "applications": applications, "form_fields": fields},
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "scenarios": results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
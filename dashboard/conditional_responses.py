@@ -0,0 +1,87 @@
+"""
+Conditional GET and compression for the responses of both backends.
+
+A CachedBody is a serialized response body with its ETag and Last-Modified; its gzip and brotli
+variants are compressed once and reused for every client that accepts them. conditional_response()
+sends the variant the client accepts, each encoding under its own strong ETag, and revalidate()
+answers a client whose copy is still current with a bodiless 304 before anything is built. The
+dashboard's /api/data responses and both servers' public form config (and the form server's
+pre-rendered page) are served through it.
+"""
+
+import gzip
+from datetime import datetime, timezone
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Optional; responses fall back to gzip
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
+
+
+def negotiate_encoding():
+    """Picks the best compression the client accepts: brotli when available, then gzip."""
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+class CachedBody:
+    """A serialized response with its validators; compressed variants are built once per encoding."""
+
+    def __init__(self, body, etag, last_modified=None, mimetype='application/json'):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.mimetype = mimetype
+        self._encoded = {}
+
+    def encode(self, encoding):
+        if encoding is None or len(self.body) < COMPRESS_MIN_SIZE:
+            return None, self.body
+        if encoding not in self._encoded:
+            self._encoded[encoding] = brotli.compress(self.body) if encoding == 'br' else gzip.compress(self.body, mtime=0)
+        return encoding, self._encoded[encoding]
+
+
+def conditional_response(entry, cache_control='private, no-cache'):
+    """
+    Sends a CachedBody with its ETag and Last-Modified, compressed if the client accepts it. Clients
+    revalidating with If-None-Match or If-Modified-Since get a bodiless 304 when nothing changed.
+    """
+    encoding, body = entry.encode(negotiate_encoding())
+    response = current_app.response_class(body, mimetype=entry.mimetype)
+    # Each encoding is a different representation, so it gets its own strong ETag
+    response.set_etag(f"{entry.etag}-{encoding}" if encoding else entry.etag)
+    if entry.last_modified:
+        response.last_modified = entry.last_modified
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+def revalidate(etag, last_modified=None, cache_control='private, no-cache'):
+    """
+    Returns a 304 when the client's copy (in any encoding) is still current, so the caller can skip
+    building the body; returns None otherwise.
+    """
+    matched = next((tag for tag in (etag, f"{etag}-gzip", f"{etag}-br") if request.if_none_match.contains(tag)), None)
+    if matched is None and not request.if_none_match and last_modified and request.if_modified_since:
+        if request.if_modified_since >= datetime.fromtimestamp(last_modified, timezone.utc):
+            matched = etag
+    if matched is None:
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(matched)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    return response
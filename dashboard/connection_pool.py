@@ -0,0 +1,153 @@
+"""
+Pooled SQLite connections shared by the dashboard and the form server.
+
+Each database is opened once per pooled connection rather than once per request, in WAL mode, so the
+dashboard's long reads and applicants' writes no longer block each other. Connections are handed out
+by get_connection() and come back to the pool when the caller closes them, so the existing
+`conn = get_db_conn() ... finally: conn.close()` pattern needs no change. Up to `size` idle
+connections are kept; a burst beyond that opens extra connections that are closed again on release.
+"""
+
+import os
+import sqlite3
+import threading
+
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+
+# Applied to every new connection. WAL lets readers run alongside the writer; synchronous=NORMAL is
+# durable across application crashes in WAL mode and only syncs at checkpoints.
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),  # KiB, per connection
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """A connection whose close() hands it back to the pool it came from."""
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def discard(self):
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """Connections to one database file, reused across requests and threads."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.reused = 0
+        self.overflow = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False, factory=PooledConnection)
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def connect(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if conn is not None:
+                self.reused += 1
+            else:
+                self.opened += 1
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._lock:
+                    self.in_use -= 1
+                raise
+        conn.pool = self
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn):
+        keep = True
+        try:
+            # Whatever the caller left uncommitted is dropped, as closing a connection would
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            keep = False  # Unusable; never hand it out again
+        with self._lock:
+            self.in_use -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self.closed += 1
+            if keep:
+                self.overflow += 1
+        conn.discard()
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.closed += len(idle)
+        for conn in idle:
+            conn.discard()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "database": self.path,
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "reused": self.reused,
+                "opened": self.opened,
+                "closed": self.closed,
+                "overflow_closed": self.overflow,
+                "hit_rate": round(self.reused / self.checkouts, 3) if self.checkouts else None,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, size=POOL_SIZE):
+    """The pool of a database file; relative paths are resolved against the current directory."""
+    path = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path, size)
+        return pool
+
+
+def get_connection(path):
+    """A pooled connection (rows as sqlite3.Row) to the database at `path`; close() returns it to the pool."""
+    return get_pool(path).connect()
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
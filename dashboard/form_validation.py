@@ -0,0 +1,172 @@
+"""
+Server-side validation of applications against the rules stored in form_config.
+
+Each field's `required` flag, `validations` JSON (minLength, maxLength, pattern, errorMessage), options
+(for select/radio fields) and input type are compiled once into a FormValidator, with regexes
+precompiled. Submissions are checked against the published form version they were made with; those
+snapshots never change, so each is compiled once. The messages match the ones the applicant form
+shows client-side. Both backends and the bulk `flask validate-applications` check use it.
+"""
+
+import re
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Compiled published form versions kept in memory
+VALIDATOR_CACHE_SIZE = 8
+
+# Loose format checks for typed inputs, matching what browsers accept for these input types
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+TEL_PATTERN = re.compile(r'^\+?[0-9][0-9 ()\-]{6,19}$')
+
+
+class FieldValidator:
+    """The compiled rules of one form field; validate() returns an error message or None."""
+    __slots__ = ('name', 'label', 'type', 'required', 'min_length', 'max_length', 'pattern', 'error_message', 'options')
+
+    def __init__(self, field):
+        rules = parse_rules(field.get('validations'))
+        self.name = field['name']
+        self.label = field.get('label') or field['name']
+        self.type = field.get('type')
+        self.required = bool(field.get('required'))
+        self.min_length = _positive_int(rules.get('minLength'))
+        self.max_length = _positive_int(rules.get('maxLength'))
+        self.error_message = rules.get('errorMessage') or None
+        self.pattern = None
+        if rules.get('pattern'):
+            try:
+                self.pattern = re.compile(rules['pattern'])
+            except re.error as e:
+                # A bad admin-entered pattern must not block every submission
+                print(f"Ignoring invalid pattern for field '{self.name}': {e}")
+        options = [opt.strip() for opt in (field.get('options') or '').split(',') if opt.strip()]
+        self.options = frozenset(options) if options and self.type in ('select', 'radio') else None
+
+    def validate(self, value):
+        value = '' if value is None else str(value).strip()
+        if not value:
+            return f"{self.label} is required." if self.required else None
+        if self.min_length and len(value) < self.min_length:
+            return f"{self.label} must be at least {self.min_length} characters long."
+        if self.max_length and len(value) > self.max_length:
+            return f"{self.label} must not exceed {self.max_length} characters."
+        # JavaScript's RegExp.test() matches anywhere in the value, as re.search does
+        if self.pattern is not None and not self.pattern.search(value):
+            return self.error_message or f"{self.label} format is invalid."
+        if self.options is not None and value not in self.options:
+            return f"{self.label} must be one of: {', '.join(sorted(self.options))}."
+        return self._check_type(value)
+
+    def _check_type(self, value):
+        if self.type == 'email' and not EMAIL_PATTERN.match(value):
+            return f"{self.label} must be a valid email address."
+        if self.type == 'tel' and not TEL_PATTERN.match(value):
+            return f"{self.label} must be a valid phone number."
+        if self.type == 'number':
+            try:
+                float(value)
+            except ValueError:
+                return f"{self.label} must be a number."
+        if self.type == 'date':
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return f"{self.label} must be a date (YYYY-MM-DD)."
+        return None
+
+
+class FormValidator:
+    """All field validators of one form configuration version."""
+
+    def __init__(self, fields, version=None):
+        self.version = version
+        self.fields = [FieldValidator(field) for field in fields]
+
+    def validate(self, data):
+        """Checks one submission in a single pass and returns {field name: message} for each failure."""
+        errors = {}
+        for field in self.fields:
+            if field.type == 'file':
+                continue  # Uploads arrive in request.files, not with the form values; the upload handlers check them
+            message = field.validate(data.get(field.name))
+            if message:
+                errors[field.name] = message
+        return errors
+
+    def validate_rows(self, rows):
+        """Yields (row, errors) for every stored row (a mapping of column to value) that fails validation."""
+        for row in rows:
+            errors = self.validate(row)
+            if errors:
+                yield row, errors
+
+
+def parse_rules(validations):
+    if isinstance(validations, dict):
+        return validations
+    try:
+        rules = json.loads(validations or '{}')
+    except (TypeError, ValueError):
+        return {}
+    return rules if isinstance(rules, dict) else {}
+
+
+def _positive_int(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+_cached_validator = None
+_version_validators = OrderedDict()
+_version_validators_lock = threading.Lock()
+
+
+def get_form_validator(conn, form_version=None):
+    """
+    Returns the FormValidator for a published form version, the active one by default. Before anything
+    is published, the draft form_config is used and recompiled only when config_version changes.
+    """
+    try:
+        if form_version is None:
+            row = conn.execute("SELECT value FROM app_metadata WHERE key = 'form_version'").fetchone()
+            form_version = row[0] if row else None
+        with _version_validators_lock:
+            if form_version in _version_validators:
+                _version_validators.move_to_end(form_version)
+                return _version_validators[form_version]
+        snapshot = conn.execute("SELECT config FROM form_versions WHERE id = ?", (form_version,)).fetchone() if form_version else None
+    except sqlite3.OperationalError:
+        snapshot = None  # Publishing not set up yet
+    if snapshot is not None:
+        fields = [field for section in json.loads(snapshot[0]).values() for field in section]
+        validator = FormValidator(fields, form_version)
+        with _version_validators_lock:
+            _version_validators[form_version] = validator
+            if len(_version_validators) > VALIDATOR_CACHE_SIZE:
+                _version_validators.popitem(last=False)
+        return validator
+    return get_draft_validator(conn)
+
+
+def get_draft_validator(conn):
+    """Returns the FormValidator for the draft form config, recompiled only when config_version changes."""
+    global _cached_validator
+    try:
+        row = conn.execute("SELECT value FROM app_metadata WHERE key = 'config_version'").fetchone()
+        version = row[0] if row else 0
+    except sqlite3.OperationalError:
+        version = None  # No app_metadata yet; always recompile
+    validator = _cached_validator
+    if validator is not None and version is not None and validator.version == version:
+        return validator
+    fields = conn.execute("SELECT name, label, type, options, required, validations FROM form_config").fetchall()
+    validator = FormValidator([dict(field) for field in fields], version)
+    _cached_validator = validator
+    return validator
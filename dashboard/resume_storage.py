@@ -0,0 +1,118 @@
+"""
+Content-addressed storage of uploaded resumes.
+
+Uploads are streamed to a temporary file in fixed-size chunks, so a request never holds more than one
+chunk in memory however large the file is. The size limit and the PDF signature are checked while the
+bytes arrive, and the SHA-256 of the content is computed in the same pass. The finished file is moved to
+`<root>/ab/cd/<sha256>.pdf`: identical resumes are stored once, and nothing is ever overwritten with
+different content. Both backends store uploads through it; the path relative to the root is what goes
+into `applications.resume_path` and the `/uploads/` URLs.
+
+Nothing deletes a file when its submission fails, since an identical upload still in flight may share
+it; sweep_orphans() later removes files that no application references and that were not used for a
+grace period (storing existing content again counts as a use).
+
+When both backends are pointed at one storage root (SHARED_UPLOAD_FOLDER) and share a handoff key
+(UPLOAD_HANDOFF_KEY), the form server stores the resume once and passes the dashboard only its content
+path with an HMAC of it; the dashboard adopts the stored file instead of receiving and writing a copy.
+"""
+
+import os
+import re
+import hmac
+import hashlib
+import tempfile
+
+MAX_RESUME_SIZE = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 64 * 1024
+PDF_SIGNATURE = b'%PDF-'
+CONTENT_PATH_PATTERN = re.compile(r'^([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})\.pdf$')
+
+
+class UploadRejected(ValueError):
+    """The upload is not an acceptable resume; the message is safe to show the applicant."""
+
+
+def content_path(digest, extension='pdf'):
+    """Sharded path of a file with the given hex digest, relative to the storage root."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+def sign_reference(relative_path, key):
+    """Handoff token proving a content path was stored by a server holding `key`."""
+    return hmac.new(key.encode(), relative_path.encode(), hashlib.sha256).hexdigest()
+
+
+def adopt_reference(relative_path, token, root, key):
+    """Checks a handed-off content path and its token, and that the file is in `root`; raises UploadRejected."""
+    if not key or not relative_path or not CONTENT_PATH_PATTERN.match(relative_path):
+        raise UploadRejected("Invalid resume reference")
+    if not hmac.compare_digest(sign_reference(relative_path, key), token or ''):
+        raise UploadRejected("Invalid resume reference")
+    if not os.path.isfile(os.path.join(root, relative_path)):
+        raise UploadRejected("Referenced resume was not found in the shared upload folder")
+    os.utime(os.path.join(root, relative_path))  # In use again, so the orphan sweep leaves it alone while this submission is saved
+    return relative_path
+
+
+def store_upload(stream, root, max_size=MAX_RESUME_SIZE, chunk_size=CHUNK_SIZE):
+    """Streams a PDF upload into `root` and returns its content path there; raises UploadRejected."""
+    os.makedirs(root, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=root, prefix='.upload-', suffix='.part')
+    try:
+        digest = hashlib.sha256()
+        head = b''
+        size = 0
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadRejected(f"File size exceeds {max_size // (1024 * 1024)}MB limit")
+                if len(head) < len(PDF_SIGNATURE):
+                    head += chunk[:len(PDF_SIGNATURE) - len(head)]
+                    if len(head) == len(PDF_SIGNATURE) and head != PDF_SIGNATURE:
+                        raise UploadRejected("Invalid file type. Only PDF files are allowed.")
+                digest.update(chunk)
+                out.write(chunk)
+        if head != PDF_SIGNATURE:
+            raise UploadRejected("Invalid file type. Only PDF files are allowed.")
+
+        relative_path = content_path(digest.hexdigest())
+        target = os.path.join(root, relative_path)
+        if os.path.exists(target):
+            os.remove(temp_path)  # Same content is already stored
+            os.utime(target)  # In use again, so the orphan sweep leaves it alone while this submission is saved
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(temp_path, target)
+        return relative_path
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def sweep_orphans(root, referenced, used_before):
+    """
+    Deletes the content files in `root` that are not in `referenced` (content paths) and were last used
+    before the `used_before` timestamp, and partial uploads abandoned before it; returns the number deleted.
+    Files not named by their content, e.g. from before content addressing, are left alone.
+    """
+    removed = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            relative_path = os.path.relpath(path, root).replace(os.sep, '/')
+            partial = filename.startswith('.upload-') and filename.endswith('.part')
+            if not partial and (not CONTENT_PATH_PATTERN.match(relative_path) or relative_path in referenced):
+                continue
+            try:
+                if os.path.getmtime(path) < used_before:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for the recruitment dashboard.
+
+Fills a database with realistic applications (and statuses for some of them) at a chosen scale,
+covering the DEFAULT_FIELDS form plus any custom fields an admin has added to form_config.
+Run from the dashboard directory:
+
+    python seed_data.py --applications 100000 --database recruitment_seed.db
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import app as dashboard
+
+FIRST_NAMES = ['Aarav', 'Aditi', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Krishna', 'Meera', 'Neha',
+               'Nikhil', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Saanvi', 'Siddharth', 'Sneha', 'Tanvi', 'Vihaan']
+LAST_NAMES = ['Agarwal', 'Bansal', 'Chopra', 'Das', 'Gupta', 'Iyer', 'Jain', 'Kapoor', 'Khan', 'Mehta',
+              'Nair', 'Patel', 'Rao', 'Reddy', 'Shah', 'Sharma', 'Singh', 'Verma']
+CITIES = ['Ahmedabad', 'Bangalore', 'Bhopal', 'Chandigarh', 'Chennai', 'Coimbatore', 'Delhi', 'Dehradun',
+          'Durgapur', 'Guwahati', 'Hyderabad', 'Indore', 'Jaipur', 'Jamshedpur', 'Kanpur', 'Kharagpur',
+          'Kolkata', 'Kozhikode', 'Lucknow', 'Madurai', 'Mumbai', 'Nagpur', 'Noida', 'Patna', 'Pune',
+          'Raipur', 'Ranchi', 'Roorkee', 'Surat', 'Surathkal', 'Tiruchirappalli', 'Vadodara', 'Varanasi', 'Warangal']
+INSTITUTE_TYPES = ['Indian Institute of Technology', 'National Institute of Technology', 'Government Engineering College',
+                   'Institute of Management', 'University College of Engineering', 'College of Commerce']
+# A few hundred distinct colleges with a long tail, like a real campus drive
+COLLEGES = [f"{kind} {city}" for kind in INSTITUTE_TYPES for city in CITIES]
+COURSES = ['B.Tech', 'B.E.', 'B.Sc', 'B.Com', 'BBA', 'BCA', 'B.Arch', 'M.Tech', 'MBA', 'MCA']
+SPECIALIZATIONS = ['Civil Engineering', 'Computer Science', 'Electrical Engineering', 'Electronics', 'Finance',
+                   'Human Resources', 'Marketing', 'Mechanical Engineering', 'Chemical Engineering', 'Statistics']
+BOARDS = ['CBSE', 'ICSE', 'State Board']
+DIVISIONS = ['First', 'First with Distinction', 'Second']
+HOBBIES = ['Reading', 'Cricket', 'Music', 'Travelling', 'Photography', 'Chess', 'Painting', 'Coding']
+# Share of applications that have moved past 'Applied', and how they are spread across later stages
+STATUS_WEIGHTS = {'Shortlisted': 40, 'Interviewed': 25, 'Offered': 10, 'Hired': 7, 'Rejected': 18}
+
+
+def skewed_choice(rng, values):
+    """Picks from values with a Zipf-like skew, so a few values are common and the rest form a long tail."""
+    return rng.choices(values, weights=[1 / (rank + 1) for rank in range(len(values))])[0]
+
+
+def generate_value(rng, field, index, person):
+    """Returns a plausible answer for one form field of the index-th application."""
+    name, field_type = field['name'], field['type']
+    options = [opt.strip() for opt in (field['options'] or '').split(',') if opt.strip()]
+
+    if name == 'name':
+        return f"{person[0]} {person[1]}"
+    if name == 'email':
+        return f"{person[0]}.{person[1]}.{index}@example.com".lower()
+    if options and field_type in ('select', 'radio'):
+        return skewed_choice(rng, options)
+    if options and field_type == 'checkbox':
+        return ', '.join(rng.sample(options, rng.randint(1, len(options))))
+    if field_type == 'date':
+        return (datetime(1996, 1, 1) + timedelta(days=rng.randint(0, 365 * 8))).strftime('%Y-%m-%d')
+    if field_type == 'number':
+        return str(rng.randint(0, 3))
+    if field_type == 'tel':
+        return f"9{rng.randint(0, 999999999):09d}"
+    if field_type == 'email':
+        return f"{name}.{index}@example.com"
+
+    if name.endswith(('_school', '_grad_school', '_pg_school')):
+        return skewed_choice(rng, COLLEGES)
+    if name.endswith('_course'):
+        return skewed_choice(rng, COURSES)
+    if name.endswith(('_specialization', '_subjects')):
+        return rng.choice(SPECIALIZATIONS)
+    if name.endswith('_board'):
+        return rng.choice(BOARDS)
+    if name.endswith('_year'):
+        return str(rng.randint(2012, 2025))
+    if name.endswith('_marks'):
+        return f"{rng.uniform(55, 98):.1f}"
+    if name.endswith('_division'):
+        return rng.choice(DIVISIONS)
+    if name == 'hobbies':
+        return ', '.join(rng.sample(HOBBIES, 2))
+    if name in ('place_of_birth', 'present_address', 'permanent_address'):
+        return f"{rng.randint(1, 400)}, Sector {rng.randint(1, 60)}, {rng.choice(CITIES)}"
+    if name == 'nationality':
+        return 'Indian'
+    if field_type == 'textarea':
+        return ''
+    return f"{field['label']} {rng.randint(1, 50)}"
+
+
+def seed(database, applications, status_ratio=0.4, batch_size=5000, seed_value=42):
+    """Appends `applications` synthetic rows to `database` and returns the number of statuses written."""
+    dashboard.DATABASE = database
+    dashboard.init_db()
+    rng = random.Random(seed_value)
+
+    conn = dashboard.get_db_conn()
+    try:
+        fields = [dict(row) for row in conn.execute("SELECT name, label, type, options FROM form_config ORDER BY field_order")]
+        app_columns = set(dashboard.get_application_columns(conn))
+        fields = [field for field in fields if field['name'] in app_columns]
+        # Continue numbering after any existing rows so emails stay unique across repeated runs
+        start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM applications").fetchone()[0]
+
+        form_version = dashboard.get_active_form_version(conn)[0] or None
+        columns = [field['name'] for field in fields] + ['submission_timestamp', 'resume_path', 'email_normalized', 'form_version']
+        insert_sql, to_params = dashboard.get_storage_layout(conn).insert_statement(columns)
+        status_names, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        now = datetime.now()
+        statuses_written = 0
+
+        for batch_start in range(start, start + applications, batch_size):
+            rows, statuses = [], []
+            for index in range(batch_start, min(batch_start + batch_size, start + applications)):
+                person = (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+                answers = {field['name']: generate_value(rng, field, index, person) for field in fields}
+                email = dashboard.normalize_email(answers.get('email') or f"applicant.{index}@example.com")
+                submitted = now - timedelta(days=rng.uniform(0, 180))
+                rows.append(to_params({**answers, 'submission_timestamp': submitted.strftime('%Y-%m-%d %H:%M:%S'),
+                                       'resume_path': 'seed_resume.pdf', 'email_normalized': email, 'form_version': form_version}))
+                if rng.random() < status_ratio:
+                    statuses.append((email, answers.get('name'), rng.choices(status_names, weights=status_weights)[0]))
+            conn.executemany(insert_sql, rows)
+            conn.executemany("INSERT OR REPLACE INTO statuses (email, name, status) VALUES (?, ?, ?)", statuses)
+            conn.commit()
+            statuses_written += len(statuses)
+            print(f"Inserted {index + 1 - start}/{applications} applications...")
+
+        # Counters are rebuilt once at the end instead of being bumped row by row
+        dashboard.rebuild_rollups(conn, commit=False)
+        dashboard.bump_data_generation(conn)
+        conn.commit()
+        return statuses_written
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a dashboard database with synthetic applications.")
+    parser.add_argument('--applications', type=int, default=10000, help="Number of applications to generate (default 10000)")
+    parser.add_argument('--database', default='recruitment_seed.db', help="SQLite file to create or extend (default recruitment_seed.db)")
+    parser.add_argument('--status-ratio', type=float, default=0.4, help="Share of applications given a status beyond 'Applied' (default 0.4)")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Rows inserted per transaction (default 5000)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed, for repeatable datasets (default 42)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    statuses = seed(args.database, args.applications, args.status_ratio, args.batch_size, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Seeded {args.applications} applications and {statuses} statuses into {args.database} "
+          f"in {elapsed:.1f}s ({args.applications / elapsed:.0f} rows/s).")
+
+
+if __name__ == '__main__':
+    main()
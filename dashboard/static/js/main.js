@@ -2,44 +2,78 @@ document.addEventListener('DOMContentLoaded', function() {
     // Global state for chart instances and current table data
     const charts = {};
     let currentTableData = [];
+    // Keyset pagination state for the responses table; `cursors` holds the cursor of every page visited so far
+    const tableState = { cursors: [], nextCursor: null, sort: 'id', direction: 'asc', search: '', total: 0, allColumns: [], defaultColumns: [] };
+    // The status modal pages through everyone matching the filters on its own, independently of the table
+    const statusModalState = { nextCursor: null, search: '', total: 0 };
+    const STATUS_MODAL_PAGE_SIZE = 200;
 
     // --- Main Application Logic ---
 
     /**
      * Fetches all dashboard data from the backend and orchestrates the UI update.
      */
-    async function fetchDataAndRender() {
-        showLoading(true);
-        hideError();
-
+    function getFilterParams() {
         const params = new URLSearchParams();
         document.querySelectorAll('.filter-select').forEach(sel => {
             if (sel.value && sel.value !== 'all') {
                 params.append(sel.name, sel.value);
             }
         });
+        return params;
+    }
 
-        try {
-            const response = await fetch(`/api/data?${params.toString()}`);
-            const data = await response.json();
+    function getTableParams(cursor = null) {
+        const params = getFilterParams();
+        params.append('sort', tableState.sort);
+        params.append('direction', tableState.direction);
+        if (tableState.search) params.append('search', tableState.search);
+        if (cursor) params.append('cursor', cursor);
+        return params;
+    }
 
-            if (!response.ok) {
-                throw new Error(data.message || 'An unknown error occurred on the server.');
-            }
-            
-            currentTableData = data.table_data || [];
+    async function fetchJSON(url) {
+        const response = await fetch(url);
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || data.message || 'An unknown error occurred on the server.');
+        }
+        return data;
+    }
 
-            if (!document.getElementById('location-filter').dataset.populated) {
-                populateFilterOptions(data.filters);
-            }
+    /**
+     * Loads the KPIs, each chart, the first table page and (once) the filter options in parallel.
+     * Every endpoint carries its own ETag, so pieces a write did not change come back as 304s.
+     */
+    async function fetchDataAndRender() {
+        showLoading(true);
+        hideError();
 
-            updateKPIs(data.kpis);
-            updateAllCharts(data.charts);
-            populateTable(data.table_data, data.all_columns, data.default_columns);
-            populateStatusModal(data.table_data);
-            
-            // Repopulate column selector every time to reflect schema changes
-            populateColumnSelector(data.all_columns, data.default_columns);
+        const filterQuery = getFilterParams().toString();
+        const chartNames = ['apps_per_company', 'apps_per_college', 'gender_diversity', 'recruitment_funnel'];
+
+        try {
+            const kpisLoaded = fetchJSON(`/api/data/kpis?${filterQuery}`).then(updateKPIs);
+
+            const chartsLoaded = Promise.all(chartNames.map(name => fetchJSON(`/api/data/charts/${name}?${filterQuery}`)))
+                .then(results => updateAllCharts(Object.fromEntries(chartNames.map((name, i) => [name, results[i]]))));
+
+            tableState.cursors = [null];
+            const tableLoaded = fetchJSON(`/api/data/table?${getTableParams().toString()}`).then(data => {
+                currentTableData = data.rows || [];
+                tableState.allColumns = data.all_columns || [];
+                tableState.defaultColumns = data.default_columns || [];
+                updateTablePager(data);
+                populateTable(data.rows, data.all_columns, data.default_columns);
+                // Repopulate column selector every time to reflect schema changes
+                populateColumnSelector(data.all_columns, data.default_columns);
+            });
+
+            const facetsLoaded = document.getElementById('location-filter').dataset.populated
+                ? Promise.resolve()
+                : fetchJSON(`/api/data/facets?${filterQuery}`).then(populateFilterOptions);
+
+            await Promise.all([kpisLoaded, chartsLoaded, tableLoaded, facetsLoaded]);
 
         } catch (error) {
             console.error('Dashboard Render Error:', error);
@@ -49,6 +83,65 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    /**
+     * Loads a single page of the responses table without recomputing KPIs and charts.
+     * `pageIndex` indexes into tableState.cursors; one past the end means "next page".
+     */
+    async function fetchTablePage(pageIndex) {
+        if (pageIndex === tableState.cursors.length) {
+            if (!tableState.nextCursor) return;
+            tableState.cursors.push(tableState.nextCursor);
+        }
+        tableState.cursors = tableState.cursors.slice(0, pageIndex + 1);
+        const params = getTableParams(tableState.cursors[pageIndex]);
+
+        try {
+            const response = await fetch(`/api/data/table?${params.toString()}`);
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || data.message || 'An unknown error occurred on the server.');
+            }
+            currentTableData = data.rows || [];
+            updateTablePager(data);
+            populateTable(data.rows, data.all_columns, getVisibleColumns());
+        } catch (error) {
+            console.error('Table Page Error:', error);
+            showError(`Failed to load table page. ${error.message}`);
+        }
+    }
+
+    function updateTablePager(meta = {}) {
+        tableState.nextCursor = meta.next_cursor || null;
+        tableState.total = meta.total || 0;
+        const pageSize = meta.page_size || 0;
+        const pageIndex = Math.max(tableState.cursors.length - 1, 0);
+        const first = tableState.total === 0 ? 0 : pageIndex * pageSize + 1;
+        const last = Math.min((pageIndex + 1) * pageSize, tableState.total);
+
+        const info = document.getElementById('table-page-info');
+        if (info) info.textContent = `Showing ${first}-${last} of ${tableState.total}`;
+        const prevBtn = document.getElementById('table-prev-btn');
+        const nextBtn = document.getElementById('table-next-btn');
+        if (prevBtn) prevBtn.disabled = pageIndex === 0;
+        if (nextBtn) nextBtn.disabled = !tableState.nextCursor;
+    }
+
+    function getVisibleColumns() {
+        const checked = Array.from(document.querySelectorAll('#column-selector-options input:checked')).map(cb => cb.value);
+        return checked.length > 0 ? checked : tableState.defaultColumns;
+    }
+
+    function handleSortChange(column) {
+        if (tableState.sort === column) {
+            tableState.direction = tableState.direction === 'asc' ? 'desc' : 'asc';
+        } else {
+            tableState.sort = column;
+            tableState.direction = 'asc';
+        }
+        tableState.cursors = [null];
+        fetchTablePage(0);
+    }
+
     // --- UI Update Functions (KPIs, Charts, etc. - largely unchanged) ---
 
     function updateKPIs(kpis = {}) {
@@ -81,8 +174,13 @@ document.addEventListener('DOMContentLoaded', function() {
         const trHead = document.createElement('tr');
         allColumns.forEach(col => {
             const th = document.createElement('th');
-            th.className = 'py-2 px-4 border-b text-left sticky top-0 bg-gray-200';
+            th.className = 'py-2 px-4 border-b text-left sticky top-0 bg-gray-200 cursor-pointer select-none';
+            th.dataset.column = col;
             th.textContent = col;
+            if (tableState.sort === col) {
+                th.textContent += tableState.direction === 'asc' ? ' \u25B2' : ' \u25BC';
+            }
+            th.addEventListener('click', () => handleSortChange(col));
             if (!defaultColumns.includes(col)) {
                 th.style.display = 'none';
             }
@@ -121,14 +219,43 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    function populateStatusModal(tableData = []) {
+    function openStatusModal() {
+        statusModalState.search = '';
+        const search = document.getElementById('status-modal-search');
+        if (search) search.value = '';
+        document.getElementById('status-modal').classList.remove('hidden');
+        loadStatusModal();
+    }
+
+    /**
+     * Lists the applicants matching the dashboard filters (and the modal's own search) in the status
+     * modal, a page at a time from /api/data/table; `append` adds the next page below those listed.
+     */
+    async function loadStatusModal(append = false) {
+        const params = getFilterParams();
+        params.append('sort', 'name');
+        params.append('page_size', STATUS_MODAL_PAGE_SIZE);
+        if (statusModalState.search) params.append('search', statusModalState.search);
+        if (append && statusModalState.nextCursor) params.append('cursor', statusModalState.nextCursor);
+        try {
+            const data = await fetchJSON(`/api/data/table?${params.toString()}`);
+            statusModalState.nextCursor = data.next_cursor || null;
+            statusModalState.total = data.total || 0;
+            populateStatusModal(data.rows, append);
+        } catch (error) {
+            console.error('Status Modal Error:', error);
+            showError(`Failed to load applicants. ${error.message}`);
+        }
+    }
+
+    function populateStatusModal(tableData = [], append = false) {
         const modalBody = document.querySelector('#status-modal-body');
         if (!modalBody) return;
-        modalBody.innerHTML = '';
+        if (!append) modalBody.innerHTML = '';
         const statuses = ['Applied', 'Shortlisted', 'Interviewed', 'Offered', 'Hired', 'Rejected'];
 
         const uniqueCandidates = [];
-        const seenEmails = new Set();
+        const seenEmails = new Set(Array.from(modalBody.querySelectorAll('.status-select')).map(select => select.dataset.email.toLowerCase()));
 
         tableData.forEach(row => {
             const email = row.email;
@@ -155,11 +282,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 </td>
             `;
             modalBody.appendChild(tr);
+            tr.querySelector('.status-select').addEventListener('change', handleStatusChange);
         });
-        
-        document.querySelectorAll('.status-select').forEach(select => {
-            select.addEventListener('change', handleStatusChange);
-        });
+
+        const info = document.getElementById('status-modal-info');
+        if (info) info.textContent = `Showing ${modalBody.querySelectorAll('tr').length} of ${statusModalState.total}`;
+        const moreBtn = document.getElementById('status-modal-more-btn');
+        if (moreBtn) moreBtn.disabled = !statusModalState.nextCursor;
     }
     
     function populateColumnSelector(allColumns = [], defaultColumns = []) {
@@ -184,21 +313,40 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    const FACET_SELECTS = {
+        locations: 'location-filter', posts: 'post-filter', qualifications: 'qualification-filter',
+        business_entities: 'business-entity-filter', courses: 'course-filter', colleges: 'college-filter'
+    };
+
+    /**
+     * Fills the filter dropdowns from /api/data/facets, which returns the most common values with
+     * their counts. The currently selected value is kept even if it falls outside the top-N.
+     */
     function populateFilterOptions(filters = {}) {
-        const populate = (id, options, selectedValue) => {
-            const select = document.getElementById(id);
+        Object.entries(filters).forEach(([facet, options]) => {
+            const select = document.getElementById(FACET_SELECTS[facet]);
             if (!select) return;
+            const selectedValue = select.value;
             while (select.options.length > 1) select.remove(1);
-            options.forEach(opt => select.add(new Option(opt, opt)));
-            if (selectedValue) select.value = selectedValue;
+            options.forEach(opt => select.add(new Option(`${opt.value} (${opt.count})`, opt.value)));
+            if (selectedValue !== 'all' && !options.some(opt => opt.value === selectedValue)) {
+                select.add(new Option(selectedValue, selectedValue));
+            }
+            select.value = selectedValue || 'all';
             select.dataset.populated = 'true';
-        };
-        populate('location-filter', filters.locations || []);
-        populate('post-filter', filters.posts || []);
-        populate('qualification-filter', filters.qualifications || []);
-        populate('business-entity-filter', filters.business_entities || []);
-        populate('course-filter', filters.courses || []);
-        populate('college-filter', filters.colleges || []);
+        });
+    }
+
+    async function searchFacet(input) {
+        const params = getFilterParams();
+        params.delete(document.getElementById(input.dataset.target).name);
+        params.append('facet', input.dataset.facet);
+        if (input.value.trim()) params.append('prefix', input.value.trim());
+        try {
+            populateFilterOptions(await fetchJSON(`/api/data/facets?${params.toString()}`));
+        } catch (error) {
+            console.error('Facet search failed:', error);
+        }
     }
     
     function updateAllCharts(chartData = {}) {
@@ -302,7 +450,7 @@ document.addEventListener('DOMContentLoaded', function() {
         if (!table) return;
 
         table.querySelectorAll('thead th').forEach((th, index) => {
-            const isVisible = selectedColumns.includes(th.textContent);
+            const isVisible = selectedColumns.includes(th.dataset.column || th.textContent);
             th.style.display = isVisible ? '' : 'none';
             table.querySelectorAll('tbody tr').forEach(tr => {
                 if (tr.children[index]) {
@@ -814,6 +962,7 @@ document.addEventListener('DOMContentLoaded', function() {
             populateExistingSections(currentSections);
             populateSortableFields(currentFields);
             populateValidationsTab(currentFields);
+            loadPublishStatus();
             
             document.getElementById('form-config-modal').classList.remove('hidden');
         } catch (error) {
@@ -821,6 +970,34 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    async function loadPublishStatus() {
+        const status = document.getElementById('form-publish-status');
+        if (!status) return;
+        try {
+            const response = await fetch('/api/form/versions');
+            if (!response.ok) throw new Error('Failed to fetch form versions.');
+            const result = await response.json();
+            status.textContent = result.unpublished_changes
+                ? `Version ${result.active} is live; the draft has unpublished changes.`
+                : `Version ${result.active} is live and matches the draft.`;
+        } catch (error) {
+            status.textContent = '';
+        }
+    }
+
+    async function handlePublishForm() {
+        if (!confirm('Publish the current form configuration? Applicants will be served it within a minute.')) return;
+        try {
+            const response = await fetch('/api/form/publish', { method: 'POST' });
+            const result = await response.json();
+            if (!response.ok) throw new Error(result.error || 'Failed to publish the form.');
+            alert(result.message);
+            loadPublishStatus();
+        } catch (error) {
+            alert(`Could not publish the form: ${error.message}`);
+        }
+    }
+
     function populateFieldList(fields = []) {
         const fieldListBody = document.getElementById('field-list-body');
         if (!fieldListBody) return;
@@ -1258,7 +1435,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     async function handleDeleteField(event) {
         const fieldId = event.target.dataset.fieldId;
-        if (!confirm('Are you sure you want to delete this field? This will remove the corresponding column and all its data from the database. This action cannot be undone.')) return;
+        if (!confirm('Are you sure you want to delete this field? Once the form is published without it, the corresponding column and all its data are removed from the database. This action cannot be undone.')) return;
 
         try {
             const response = await fetch(`/api/form/config/${fieldId}`, { method: 'DELETE' });
@@ -1695,33 +1872,19 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    function downloadCSV() {
-        if (!currentTableData || currentTableData.length === 0) {
-            alert("No data available to download.");
-            return;
-        }
-
+    /**
+     * Hands the export to the server, which streams every row matching the current filters and search
+     * in the selected columns.
+     */
+    function downloadExport(format) {
+        const params = getFilterParams();
+        if (tableState.search) params.append('search', tableState.search);
         const selectedColumns = Array.from(document.querySelectorAll('#column-selector-options input:checked')).map(cb => cb.value);
-        const headers = selectedColumns.length > 0 ? selectedColumns : Object.keys(currentTableData[0]);
-        
-        const formatCell = (cell) => {
-            let cellString = String(cell === null || cell === undefined ? '' : cell);
-            if (cellString.search(/("|,|\n)/g) >= 0) {
-                cellString = `"${cellString.replace(/"/g, '""')}"`;
-            }
-            return cellString;
-        };
+        if (selectedColumns.length > 0) params.append('columns', selectedColumns.join(','));
+        params.append('format', format);
 
-        const csvContent = [
-            headers.join(','),
-            ...currentTableData.map(row => headers.map(header => formatCell(row[header])).join(','))
-        ].join('\n');
-        
-        const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
         const link = document.createElement("a");
-        const url = URL.createObjectURL(blob);
-        link.setAttribute("href", url);
-        link.setAttribute("download", "recruitment_data.csv");
+        link.setAttribute("href", `/api/data/export?${params.toString()}`);
         link.style.visibility = 'hidden';
         document.body.appendChild(link);
         link.click();
@@ -1738,6 +1901,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 let openAction = () => modal.classList.remove('hidden');
                 if (modalId === 'user-management-modal') openAction = openUserManagementModal;
                 if (modalId === 'form-config-modal') openAction = openFormConfigModal;
+                if (modalId === 'status-modal') openAction = openStatusModal;
                 openBtn.addEventListener('click', openAction);
             }
             closeBtnIds.forEach(closeBtnId => {
@@ -1785,6 +1949,7 @@ document.addEventListener('DOMContentLoaded', function() {
         document.getElementById('edit-field-type')?.addEventListener('change', toggleEditOptionsContainer);
         document.getElementById('save-field-edit')?.addEventListener('click', handleSaveFieldEdit);
         document.getElementById('save-field-order')?.addEventListener('click', handleSaveFieldOrder);
+        document.getElementById('publish-form-btn')?.addEventListener('click', handlePublishForm);
         
         // Initialize form config tabs
         initializeFormConfigTabs();
@@ -1824,7 +1989,38 @@ document.addEventListener('DOMContentLoaded', function() {
         });
         window.addEventListener('click', () => columnSelectorDropdown?.classList.add('hidden'));
 
-        document.getElementById('download-csv-btn').addEventListener('click', downloadCSV);
+        document.getElementById('download-csv-btn').addEventListener('click', () => downloadExport('csv'));
+        document.getElementById('download-xlsx-btn').addEventListener('click', () => downloadExport('xlsx'));
+
+        // --- Responses table paging and search ---
+        document.getElementById('table-prev-btn')?.addEventListener('click', () => fetchTablePage(tableState.cursors.length - 2));
+        document.getElementById('table-next-btn')?.addEventListener('click', () => fetchTablePage(tableState.cursors.length));
+        document.querySelectorAll('.facet-search').forEach(input => {
+            let facetTimer = null;
+            input.addEventListener('input', () => {
+                clearTimeout(facetTimer);
+                facetTimer = setTimeout(() => searchFacet(input), 250);
+            });
+        });
+
+        let searchTimer = null;
+        document.getElementById('table-search')?.addEventListener('input', (e) => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => {
+                tableState.search = e.target.value.trim();
+                tableState.cursors = [null];
+                fetchTablePage(0);
+            }, 300);
+        });
+        let statusSearchTimer = null;
+        document.getElementById('status-modal-search')?.addEventListener('input', (e) => {
+            clearTimeout(statusSearchTimer);
+            statusSearchTimer = setTimeout(() => {
+                statusModalState.search = e.target.value.trim();
+                loadStatusModal();
+            }, 300);
+        });
+        document.getElementById('status-modal-more-btn')?.addEventListener('click', () => loadStatusModal(true));
     }
 
     function initializeUserMenu() {
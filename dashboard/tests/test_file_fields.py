@@ -0,0 +1,57 @@
+"""
+Submissions to a form with a required file field other than the resume.
+
+Run from the dashboard directory with `python -m pytest tests`. Each test works on a copy of
+recruitment_final.db in a temporary directory.
+"""
+
+import importlib
+import io
+import os
+import random
+import shutil
+import sys
+
+import pytest
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DASHBOARD_DIR)
+
+
+@pytest.fixture
+def dashboard(tmp_path, monkeypatch):
+    shutil.copy(os.path.join(DASHBOARD_DIR, 'recruitment_final.db'), tmp_path / 'recruitment_final.db')
+    monkeypatch.chdir(tmp_path)
+    app_module = importlib.reload(sys.modules['app']) if 'app' in sys.modules else importlib.import_module('app')
+    app_module.app.config['TESTING'] = True
+    app_module.init_db()
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'], session['user_role'], session['user_email'] = 1, 'admin', 'admin@test.com'
+    return client
+
+
+def upload(name):
+    return io.BytesIO(b'%PDF-1.4\n' + name.encode() * 64), f'{name}.pdf'
+
+
+def test_required_file_field_is_accepted_when_attached(dashboard):
+    import seed_data
+
+    response = dashboard.post('/api/form/config', json={
+        'label': 'Cover Letter', 'name': 'cover_letter', 'type': 'file', 'subsection': 'Personal Details', 'required': True})
+    assert response.status_code == 200
+    assert dashboard.post('/api/form/publish').status_code == 200
+
+    config = dashboard.get('/api/public/form-config').get_json()
+    fields = [field for section in config.values() for field in section]
+    assert any(field['name'] == 'cover_letter' and field['required'] for field in fields)
+    rng = random.Random(7)
+    data = {field['name']: seed_data.generate_value(rng, field, 0, ('Test', 'Applicant'))
+            for field in fields if field['type'] != 'file'}
+    data['email'] = 'cover.letter@test.com'
+    data['cv-resume'] = upload('resume')
+    data['cover_letter'] = upload('cover')
+
+    response = dashboard.post('/api/submit_application', data=data, content_type='multipart/form-data')
+    assert response.status_code in (200, 201), response.get_json()
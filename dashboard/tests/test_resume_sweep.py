@@ -0,0 +1,44 @@
+"""
+The orphan sweep of the content-addressed resume storage.
+
+Run from the dashboard directory with `python -m pytest tests`.
+"""
+
+import io
+import os
+import sys
+import time
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DASHBOARD_DIR)
+
+from resume_storage import store_upload, sweep_orphans
+
+
+def upload(content):
+    return io.BytesIO(b'%PDF-1.4\n' + content * 64)
+
+
+def age(root, relative_path, seconds):
+    past = time.time() - seconds
+    os.utime(os.path.join(root, relative_path), (past, past))
+
+
+def test_sweep_deletes_only_unreferenced_files_past_the_grace_period(tmp_path):
+    root = str(tmp_path)
+    orphan, recent, referenced, reused = (store_upload(upload(name), root) for name in (b'orphan', b'recent', b'referenced', b'reused'))
+    for path in (orphan, referenced, reused):
+        age(root, path, 7200)
+    (tmp_path / '.upload-abandoned.part').write_bytes(b'')
+    (tmp_path / 'legacy.pdf').write_bytes(b'')
+    age(root, '.upload-abandoned.part', 7200)
+    age(root, 'legacy.pdf', 7200)
+    # Storing the same content again counts as a use
+    assert store_upload(upload(b'reused'), root) == reused
+
+    assert sweep_orphans(root, {referenced}, time.time() - 3600) == 2
+
+    assert not os.path.exists(os.path.join(root, orphan))
+    assert not os.path.exists(os.path.join(root, '.upload-abandoned.part'))
+    for path in (recent, referenced, reused, 'legacy.pdf'):
+        assert os.path.exists(os.path.join(root, path))
@@ -5,23 +5,58 @@ Runs on port 5001 and handles form submissions
 """
 
 import os
+import json
 import sqlite3
+import time
+import threading
 import traceback
-from datetime import datetime
-from collections import defaultdict
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timezone
+from collections import deque
 from flask import Flask, request, jsonify, render_template, send_from_directory
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+from dashboard.form_validation import get_form_validator
+from dashboard.application_storage import get_storage_layout
+from dashboard.resume_storage import UploadRejected, sign_reference, store_upload
+from dashboard.connection_pool import get_connection, pool_stats
+from dashboard.conditional_responses import CachedBody, conditional_response, revalidate
+from dashboard.application_rollups import normalize_email, bump_data_generation, record_application_rollups, record_pipeline_entries
 
 app = Flask(__name__, 
            template_folder='campus',
            static_folder='campus/static')
-CORS(app)
+CORS(app, expose_headers=['X-Form-Version'])
 
 # Configuration
-UPLOAD_FOLDER = 'campus/uploads'
+# With a folder shared with the dashboard and a handoff key, resumes are stored once and passed to the dashboard by reference
+SHARED_UPLOAD_FOLDER = os.environ.get('SHARED_UPLOAD_FOLDER')
+UPLOAD_HANDOFF_KEY = os.environ.get('UPLOAD_HANDOFF_KEY')
+UPLOAD_FOLDER = SHARED_UPLOAD_FOLDER or 'campus/uploads'
+# Where the dashboard stores resumes and serves /uploads from; the database fallback records paths there
+DASHBOARD_UPLOAD_FOLDER = SHARED_UPLOAD_FOLDER or 'dashboard/uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
 MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB
+FORM_CONFIG_MAX_AGE = 60  # seconds browsers may reuse the active form config (and pre-rendered form page) before revalidating
+# 'server' sends the form page fully rendered with its config embedded; 'client' sends the empty shell that fetches the config
+FORM_RENDERING = os.environ.get('FORM_RENDERING', 'server')
+
+# Dashboard backend calls: pooled keep-alive connections, bounded waits and a circuit breaker
+DASHBOARD_URL = os.environ.get('DASHBOARD_URL', 'http://127.0.0.1:5000')
+DASHBOARD_CONNECT_TIMEOUT = float(os.environ.get('DASHBOARD_CONNECT_TIMEOUT', 2))  # seconds
+DASHBOARD_READ_TIMEOUT = float(os.environ.get('DASHBOARD_READ_TIMEOUT', 10))  # seconds
+DASHBOARD_POOL_SIZE = int(os.environ.get('DASHBOARD_POOL_SIZE', 20))
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures before calls go straight to the database fallback
+BREAKER_RESET_SECONDS = 30  # how long the breaker stays open before a single probe call is let through
+
+# Submissions are acknowledged once they are in a local SQLite outbox; background workers deliver them to the dashboard
+OUTBOX_DATABASE = os.environ.get('SUBMISSION_OUTBOX', 'campus/outbox.db')
+OUTBOX_WORKERS = int(os.environ.get('OUTBOX_WORKERS', 2))
+OUTBOX_MAX_ATTEMPTS = 5  # failed deliveries before the submission is written to the database directly
+OUTBOX_RETRY_BASE_SECONDS = 2  # delay before the first retry, doubled after each further failure
+OUTBOX_RETRY_MAX_SECONDS = 300
+OUTBOX_POLL_SECONDS = 1  # how often idle workers look for retries that have come due
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
@@ -29,20 +64,143 @@ app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+class DashboardUnavailable(Exception):
+    """Raised instead of calling the dashboard while its circuit breaker is open"""
+
+class CircuitBreaker:
+    """Closed: calls flow. Open: calls fail fast until the reset timeout. Half-open: one probe decides"""
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=100)  # seconds, most recent calls
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                return True  # This caller is the probe
+            if self.state == 'closed':
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency):
+        with self._lock:
+            self.calls += 1
+            self.latencies.append(latency)
+            self.state, self.consecutive_failures, self.opened_at = 'closed', 0, None
+
+    def record_failure(self, latency, error):
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.latencies.append(latency)
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                self.state, self.opened_at = 'open', time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.opened_at else None,
+                "calls": self.calls, "failures": self.failures, "rejected": self.rejected,
+                "last_error": self.last_error,
+                "latency_ms": {
+                    "last": round(self.latencies[-1] * 1000, 1),
+                    "avg": round(sum(latencies) / len(latencies) * 1000, 1),
+                    "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                } if latencies else None,
+            }
+
+class DashboardClient:
+    """Shared keep-alive session to the dashboard backend; every call has timeouts and goes through the breaker"""
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=DASHBOARD_POOL_SIZE, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, **kwargs):
+        if not self.breaker.allow_request():
+            raise DashboardUnavailable(f"Dashboard circuit is open after {self.breaker.consecutive_failures} failures")
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, self.base_url + path,
+                                            timeout=(DASHBOARD_CONNECT_TIMEOUT, DASHBOARD_READ_TIMEOUT), **kwargs)
+        except Exception as e:
+            self.breaker.record_failure(time.monotonic() - started, e)
+            raise
+        # A 5xx means the dashboard is unhealthy; 4xx answers are the caller's problem
+        if response.status_code >= 500:
+            self.breaker.record_failure(time.monotonic() - started, f"HTTP {response.status_code}")
+        else:
+            self.breaker.record_success(time.monotonic() - started)
+        return response
+
+dashboard_client = DashboardClient(DASHBOARD_URL)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def get_db_conn():
-    """Connect to the main dashboard database"""
-    conn = sqlite3.connect('dashboard/recruitment_final.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def get_form_config_from_dashboard():
-    """Fetch form configuration from the dashboard backend"""
-    import requests
+    """Pooled connection to the main dashboard database; close() returns it to the pool"""
+    return get_connection('dashboard/recruitment_final.db')
+
+def get_form_version(conn):
+    """Returns (id, activated_at) of the published form version applicants are served"""
+    try:
+        row = conn.execute("SELECT value, updated_at FROM app_metadata WHERE key = 'form_version'").fetchone()
+    except sqlite3.OperationalError:
+        return 0, None  # Dashboard has not created app_metadata yet
+    return (row[0], row[1]) if row else (0, None)
+
+def resolve_form_version(conn, requested):
+    """The published version a submission names, or the active one if it names none that exists"""
     try:
-        response = requests.get('http://127.0.0.1:5000/api/public/form-config')
+        requested = int(requested)
+        if conn.execute("SELECT 1 FROM form_versions WHERE id = ?", (requested,)).fetchone():
+            return requested
+    except (TypeError, ValueError, sqlite3.OperationalError):
+        pass
+    return get_form_version(conn)[0] or None
+
+class FormVersionCache:
+    """The response built for one published form version, a CachedBody that keeps its compressed variants"""
+    def __init__(self):
+        self.version = None
+        self.entry = None
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        with self._lock:
+            return self.entry if self.version == version else None
+
+    def put(self, version, entry):
+        with self._lock:
+            self.version, self.entry = version, entry
+            return entry
+
+form_config_cache = FormVersionCache()  # Serialized public form config
+form_page_cache = FormVersionCache()  # Pre-rendered recruitment form page
+
+def get_form_config_from_dashboard(version):
+    """Fetch a published form version from the dashboard backend"""
+    try:
+        response = dashboard_client.request('GET', f'/api/public/form-config/{version}')
         if response.ok:
             return response.json()
         else:
@@ -51,38 +209,31 @@ def get_form_config_from_dashboard():
     except Exception as e:
         print(f"Error connecting to dashboard backend: {e}")
         # Fallback: get directly from database
-        return get_form_config_from_db()
+        return get_form_config_from_db(version)
+
+def load_form_config(version, activated_at=None):
+    """The serialized config (a CachedBody) of a published form version, from memory, the dashboard or the database; None if unavailable"""
+    # Served from memory until an admin publishes (or rolls back to) another version
+    cached = form_config_cache.get(version)
+    if cached is None:
+        # First try to get from dashboard backend
+        form_config = get_form_config_from_dashboard(version)
+
+        # If that fails, get directly from database
+        if not form_config:
+            form_config = get_form_config_from_db(version)
+
+        if not form_config:
+            return None
+        cached = form_config_cache.put(version, CachedBody(app.json.dumps(form_config), f"form-v{version}", activated_at))
+    return cached
 
-def get_form_config_from_db():
-    """Fallback: Get form configuration directly from database"""
+def get_form_config_from_db(version):
+    """Fallback: Read a published form version's snapshot directly from the database"""
     conn = get_db_conn()
     try:
-        # Get section order from form_sections table if it exists
-        section_order = {}
-        try:
-            sections_query = conn.execute("SELECT name, section_order FROM form_sections ORDER BY section_order ASC").fetchall()
-            section_order = {row['name']: row['section_order'] for row in sections_query}
-        except:
-            pass  # Table doesn't exist yet
-        
-        fields_query = conn.execute("SELECT * FROM form_config ORDER BY field_order ASC").fetchall()
-        
-        # Group fields by subsection for easier rendering
-        subsections = defaultdict(list)
-        for field in fields_query:
-            subsections[field['subsection']].append(dict(field))
-        
-        # Order subsections by section_order if available, otherwise by first field's order
-        if section_order:
-            # Sort by section order, putting unordered sections at the end
-            subsection_order = sorted(subsections.keys(), key=lambda k: section_order.get(k, 9999))
-        else:
-            # Fallback: maintain the order of subsections based on the first field's order in each
-            subsection_order = sorted(subsections.keys(), key=lambda k: subsections[k][0]['field_order'])
-        
-        ordered_subsections = {k: subsections[k] for k in subsection_order}
-        return ordered_subsections
-        
+        row = conn.execute("SELECT config FROM form_versions WHERE id = ?", (version,)).fetchone()
+        return json.loads(row['config']) if row else {}
     except Exception as e:
         print(f"Error fetching form config from database: {e}")
         return {}
@@ -99,30 +250,76 @@ def login():
     """Serve the login page"""
     return render_template('login.html')
 
+def render_form_page(form_config, version):
+    """The complete recruitment form page of one form version, with its config embedded for the client script"""
+    # Same field order the client-side renderer uses
+    sections = [(name, sorted(fields, key=lambda field: field.get('field_order') or 0)) for name, fields in form_config.items()]
+    return render_template('recruitment-form-dynamic.html', form_config=form_config, form_sections=sections,
+                           form_version=version).encode('utf-8')
+
 @app.route('/recruitment-form-dynamic.html')
 def recruitment_form():
-    """Serve the dynamic recruitment form"""
-    return render_template('recruitment-form-dynamic.html')
+    """Serve the dynamic recruitment form, pre-rendered from the active form version"""
+    if FORM_RENDERING != 'server':
+        return render_template('recruitment-form-dynamic.html')
+    try:
+        conn = get_db_conn()
+        try:
+            version, activated_at = get_form_version(conn)
+        finally:
+            conn.close()
+        etag = f"page-v{version}"
+        cache_control = f'public, max-age={FORM_CONFIG_MAX_AGE}'
+        not_modified = revalidate(etag, activated_at, cache_control)
+        if not_modified is not None:
+            return not_modified
+
+        # Rendered once per published version; the page is the same for every applicant
+        cached = form_page_cache.get(version)
+        if cached is None:
+            config = load_form_config(version, activated_at)
+            if config is None:
+                # The shell fetches the config itself (and offers a retry) once the dashboard is back
+                return render_template('recruitment-form-dynamic.html'), 200, {'Cache-Control': 'no-store'}
+            cached = form_page_cache.put(version, CachedBody(render_form_page(json.loads(config.body), version), etag, activated_at, 'text/html'))
+        return conditional_response(cached, cache_control)
+    except Exception as e:
+        print(f"Error rendering recruitment form: {e}")
+        print(traceback.format_exc())
+        return render_template('recruitment-form-dynamic.html'), 200, {'Cache-Control': 'no-store'}
 
 @app.route('/api/public/form-config', methods=['GET'])
 def get_public_form_config():
     """Public endpoint to fetch the form structure for applicants"""
     try:
-        # First try to get from dashboard backend
-        form_config = get_form_config_from_dashboard()
-        
-        # If that fails, get directly from database
-        if not form_config:
-            form_config = get_form_config_from_db()
-        
-        return jsonify(form_config)
+        # Revalidation is answered from the active version alone, without a round trip to the dashboard
+        conn = get_db_conn()
+        try:
+            version, activated_at = get_form_version(conn)
+        finally:
+            conn.close()
+        etag = f"form-v{version}"
+        cache_control = f'public, max-age={FORM_CONFIG_MAX_AGE}'
+        not_modified = revalidate(etag, activated_at, cache_control)
+        if not_modified is not None:
+            not_modified.headers['X-Form-Version'] = str(version)
+            return not_modified
+
+        cached = load_form_config(version, activated_at)
+        if cached is None:
+            return conditional_response(CachedBody(b'{}', etag, activated_at), cache_control='no-store')  # Never cache a failed load
+
+        response = conditional_response(cached, cache_control)
+        # The applicant form sends this back as `form_version` with the submission
+        response.headers['X-Form-Version'] = str(version)
+        return response
     except Exception as e:
         print(f"Error in get_public_form_config: {e}")
         return jsonify({"error": "Unable to load form configuration"}), 500
 
 @app.route('/api/submit_application', methods=['POST'])
 def api_submit_application():
-    """Handle form submission"""
+    """Handle form submission: store it in the outbox and acknowledge it with a receipt ID"""
     try:
         # Validate file upload
         if 'cv-resume' not in request.files:
@@ -135,97 +332,346 @@ def api_submit_application():
         if not (file and allowed_file(file.filename)):
             return jsonify({"error": "Invalid file type. Only PDF files are allowed."}), 400
 
-        # Check file size
-        if len(file.read()) > MAX_CONTENT_LENGTH:
-            return jsonify({"error": "File size exceeds 5MB limit"}), 400
-        
-        # Reset file pointer
-        file.seek(0)
-
-        # Save file
-        filename = secure_filename(file.filename)
-        email = request.form.get('email', 'unknown')
-        unique_filename = f"{secure_filename(email)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
-
-        # Prepare application data
-        application_data = {
-            'cv_resume_path': file_path,
-            'submission_date': datetime.now().isoformat()
-        }
-        
-        # Add all form fields
-        for key, value in request.form.items():
-            if key != 'cv-resume':  # Skip file field
-                application_data[key] = value
+        # A retried request carries the same key and gets the same receipt instead of a second submission
+        idempotency_key = request.headers.get('Idempotency-Key') or uuid.uuid4().hex
+        receipt_id = submission_outbox.find(idempotency_key)
+        if receipt_id:
+            return receipt_response(receipt_id)
 
-        # Submit to dashboard backend
-        import requests
+        # Checked here as well so the applicant sees field errors and duplicates now, not in the receipt later
+        conn = get_db_conn()
         try:
-            dashboard_response = requests.post(
-                'http://127.0.0.1:5000/api/submit_application',
-                files={'cv-resume': open(file_path, 'rb')},
-                data=request.form
-            )
-            
-            if dashboard_response.ok:
-                return jsonify({"success": True, "message": "Application submitted successfully!"})
-            else:
-                error_data = dashboard_response.json() if dashboard_response.headers.get('content-type') == 'application/json' else {}
-                return jsonify({"error": error_data.get("error", "Failed to submit application")}), dashboard_response.status_code
-                
-        except Exception as e:
-            print(f"Error submitting to dashboard backend: {e}")
-            # Fallback: save directly to database
-            return save_application_to_db(application_data)
+            form_version = resolve_form_version(conn, request.form.get('form_version'))
+            field_errors = get_form_validator(conn, form_version).validate(request.form)
+            email = request.form.get('email', '').strip()
+            # Same key the dashboard and the import deduplicate on, so case variants of a registered address are caught too
+            duplicate = not field_errors and conn.execute("SELECT 1 FROM applications WHERE email_normalized = ?", (normalize_email(email),)).fetchone()
+        finally:
+            conn.close()
+        if field_errors:
+            return jsonify({"error": "Please correct the highlighted fields.", "fields": field_errors}), 400
+        if duplicate:
+            return jsonify({"error": f"An application with the email '{email}' already exists."}), 409
+
+        # Stream to disk in chunks, checking the size limit and PDF signature on the way
+        try:
+            resume_path = store_upload(file.stream, app.config['UPLOAD_FOLDER'], MAX_CONTENT_LENGTH)
+        except UploadRejected as e:
+            return jsonify({"error": str(e)}), 400
+
+        form_data = request.form.to_dict()
+        form_data['form_version'] = form_version
+        receipt_id = submission_outbox.enqueue(idempotency_key, form_data, resume_path, file.filename)
+        return receipt_response(receipt_id)
 
     except Exception as e:
         print(f"Error in api_submit_application: {e}")
         print(traceback.format_exc())
         return jsonify({"error": "An error occurred while processing your application"}), 500
 
-def save_application_to_db(application_data):
-    """Fallback: Save application directly to database"""
+def receipt_response(receipt_id):
+    return jsonify({
+        "success": True,
+        "message": "Application received!",
+        "receipt_id": receipt_id,
+        "status_url": f"/api/submissions/{receipt_id}",
+    }), 202
+
+@app.route('/api/submissions/<receipt_id>', methods=['GET'])
+def submission_status(receipt_id):
+    """Delivery status of a submission, by the receipt ID it was acknowledged with"""
+    entry = submission_outbox.get(receipt_id)
+    if entry is None:
+        return jsonify({"error": "Receipt not found"}), 404
+    body = {
+        "receipt_id": entry['receipt_id'],
+        "status": entry['status'],  # pending, delivering, delivered, rejected or failed
+        "attempts": entry['attempts'],
+        "submitted_at": datetime.fromtimestamp(entry['created_at'], timezone.utc).isoformat(timespec='seconds'),
+        "updated_at": datetime.fromtimestamp(entry['updated_at'], timezone.utc).isoformat(timespec='seconds'),
+    }
+    if entry['status'] == 'pending' and entry['attempts']:
+        body["next_attempt_at"] = datetime.fromtimestamp(entry['next_attempt_at'], timezone.utc).isoformat(timespec='seconds')
+    if entry['status'] in ('rejected', 'failed'):
+        result = json.loads(entry['result'] or '{}')
+        body["error"] = result.get("error") or entry['last_error']
+        if result.get("fields"):
+            body["fields"] = result["fields"]  # Field-level validation errors
+    return jsonify(body)
+
+def deliver_submission(entry):
+    """Sends one outbox entry to the dashboard under its idempotency key; returns (status code, response body)"""
+    form_data = json.loads(entry['form_data'])
+    headers = {'Idempotency-Key': entry['idempotency_key']}
+    if SHARED_UPLOAD_FOLDER and UPLOAD_HANDOFF_KEY:
+        # The dashboard reads the same folder, so only the stored file's path and its token are sent
+        form_data['resume_ref'] = entry['resume_path']
+        form_data['resume_token'] = sign_reference(entry['resume_path'], UPLOAD_HANDOFF_KEY)
+        response = dashboard_client.request('POST', '/api/submit_application', data=form_data, headers=headers)
+    else:
+        with open(os.path.join(UPLOAD_FOLDER, entry['resume_path']), 'rb') as resume:
+            response = dashboard_client.request(
+                'POST', '/api/submit_application',
+                files={'cv-resume': (entry['resume_filename'] or 'resume.pdf', resume, 'application/pdf')},
+                data=form_data, headers=headers
+            )
+    if response.headers.get('content-type') == 'application/json':
+        return response.status_code, response.json()
+    return response.status_code, {"error": f"Dashboard answered HTTP {response.status_code}"}
+
+def process_submission(entry):
+    """
+    Delivers a claimed outbox entry, or schedules a retry; once retries run out, or at once while the
+    dashboard's circuit breaker is open, it is written to the database directly
+    """
+    breaker_open = False
+    try:
+        status_code, body = deliver_submission(entry)
+        error = body.get("error") if status_code >= 500 else None
+    except DashboardUnavailable as e:
+        # Retrying on the backoff schedule would only wait out the breaker before the same fallback
+        status_code, body, error, breaker_open = None, None, str(e), True
+    except Exception as e:
+        status_code, body, error = None, None, str(e)
+
+    if status_code is None or status_code >= 500:
+        if entry['attempts'] < OUTBOX_MAX_ATTEMPTS and not breaker_open:
+            submission_outbox.retry(entry, error)
+            return
+        print(f"Delivering submission {entry['receipt_id']} failed {entry['attempts']} time(s) ({error}); saving it directly")
+        # Fallback: save directly to database
+        status_code, body = save_application_to_db(json.loads(entry['form_data']), entry['resume_path'],
+                                                   entry['idempotency_key'], entry['created_at'])
+    status = 'delivered' if status_code < 400 else 'rejected' if status_code < 500 else 'failed'
+    submission_outbox.finish(entry['receipt_id'], status, body)
+
+class SubmissionOutbox:
+    """Durable local queue of acknowledged submissions; worker threads deliver them to the dashboard with backoff"""
+    def __init__(self, path, workers):
+        self.path = path
+        self.workers = workers
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+
+    def connect(self):
+        return get_connection(self.path)
+
+    def start(self):
+        """Creates the outbox and starts the delivery workers, once per process"""
+        with self._lock:
+            if self._threads:
+                return
+            conn = self.connect()
+            try:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS submission_outbox (
+                        receipt_id TEXT PRIMARY KEY,
+                        idempotency_key TEXT NOT NULL UNIQUE,
+                        form_data TEXT NOT NULL,
+                        resume_path TEXT NOT NULL,
+                        resume_filename TEXT,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        next_attempt_at REAL NOT NULL,
+                        last_error TEXT,
+                        result TEXT,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_submission_outbox_due ON submission_outbox(status, next_attempt_at)")
+                # Deliveries cut short by a restart are retried; the idempotency key keeps that from duplicating them
+                conn.execute("UPDATE submission_outbox SET status = 'pending' WHERE status = 'delivering'")
+                conn.commit()
+            finally:
+                conn.close()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'outbox-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, idempotency_key, form_data, resume_path, resume_filename):
+        """Stores a submission for delivery and returns its receipt ID; a key seen before returns the existing receipt"""
+        now = time.time()
+        conn = self.connect()
+        try:
+            conn.execute('''
+                INSERT INTO submission_outbox (receipt_id, idempotency_key, form_data, resume_path, resume_filename,
+                                               next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(idempotency_key) DO NOTHING
+            ''', (uuid.uuid4().hex, idempotency_key, json.dumps(form_data), resume_path, resume_filename, now, now, now))
+            conn.commit()
+            receipt_id = conn.execute("SELECT receipt_id FROM submission_outbox WHERE idempotency_key = ?", (idempotency_key,)).fetchone()[0]
+        finally:
+            conn.close()
+        with self._wakeup:
+            self._wakeup.notify()
+        return receipt_id
+
+    def find(self, idempotency_key):
+        """Receipt ID of the submission made under a key, or None"""
+        conn = self.connect()
+        try:
+            row = conn.execute("SELECT receipt_id FROM submission_outbox WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def claim(self):
+        """Marks the next due entry as delivering and returns it, or None when nothing is due"""
+        now = time.time()
+        conn = self.connect()
+        try:
+            row = conn.execute('''
+                UPDATE submission_outbox SET status = 'delivering', attempts = attempts + 1, updated_at = ?
+                WHERE receipt_id = (SELECT receipt_id FROM submission_outbox
+                                    WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1)
+                RETURNING *
+            ''', (now, now)).fetchone()
+            conn.commit()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def retry(self, entry, error):
+        delay = min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (entry['attempts'] - 1), OUTBOX_RETRY_MAX_SECONDS)
+        self._update(entry['receipt_id'], status='pending', next_attempt_at=time.time() + delay, last_error=error)
+
+    def finish(self, receipt_id, status, result):
+        self._update(receipt_id, status=status, result=json.dumps(result))
+
+    def _update(self, receipt_id, **values):
+        values['updated_at'] = time.time()
+        conn = self.connect()
+        try:
+            conn.execute(f"UPDATE submission_outbox SET {', '.join(f'{column} = ?' for column in values)} WHERE receipt_id = ?",
+                         (*values.values(), receipt_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, receipt_id):
+        conn = self.connect()
+        try:
+            row = conn.execute("SELECT * FROM submission_outbox WHERE receipt_id = ?", (receipt_id,)).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def snapshot(self):
+        conn = self.connect()
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM submission_outbox GROUP BY status").fetchall())
+            oldest = conn.execute("SELECT MIN(created_at) FROM submission_outbox WHERE status IN ('pending', 'delivering')").fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            "workers": len(self._threads),
+            "counts": counts,
+            "oldest_undelivered_seconds": round(time.time() - oldest, 1) if oldest else None,
+        }
+
+    def _run(self):
+        while True:
+            try:
+                entry = self.claim()
+                if entry is None:
+                    # Woken early by a new submission; otherwise polls for retries coming due
+                    with self._wakeup:
+                        self._wakeup.wait(timeout=OUTBOX_POLL_SECONDS)
+                    continue
+                process_submission(entry)
+            except Exception as e:
+                print(f"Error in submission outbox worker: {e}")
+                print(traceback.format_exc())
+                time.sleep(OUTBOX_POLL_SECONDS)
+
+submission_outbox = SubmissionOutbox(OUTBOX_DATABASE, OUTBOX_WORKERS)
+
+@app.before_request
+def start_outbox_workers():
+    # Started by the serving process rather than at import, so the debug reloader's watcher runs no workers
+    submission_outbox.start()
+
+def save_application_to_db(form_data, resume_path, idempotency_key, submitted_at):
+    """Fallback: Save application directly to database; returns (status code, response body) like the dashboard"""
     conn = get_db_conn()
     try:
-        # Get form configuration to build dynamic insert
-        form_config = get_form_config_from_db()
-        
-        # Build column names and values
-        columns = ['submission_date']
-        values = [application_data.get('submission_date')]
-        placeholders = ['?']
-        
-        # Add form fields
-        for section_fields in form_config.values():
-            for field in section_fields:
-                field_name = field['name']
-                if field_name in application_data:
-                    columns.append(field_name)
-                    values.append(application_data[field_name])
-                    placeholders.append('?')
-        
-        # Add resume path
-        if 'cv_resume_path' in application_data:
-            columns.append('resume_path')
-            values.append(application_data['cv_resume_path'])
-            placeholders.append('?')
-        
-        # Insert into database
-        query = f"INSERT INTO applications ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-        conn.execute(query, values)
+        # A delivery whose response was lost may have reached the dashboard already
+        try:
+            if conn.execute("SELECT 1 FROM submission_receipts WHERE idempotency_key = ?", (idempotency_key,)).fetchone():
+                return 200, {"success": True, "message": "Application submitted successfully.", "duplicate": True}
+        except sqlite3.OperationalError:
+            pass  # Dashboard has not created submission_receipts yet
+
+        # Same rules the dashboard enforces, from the form version the applicant filled in
+        form_version = resolve_form_version(conn, form_data.get('form_version'))
+        validator = get_form_validator(conn, form_version)
+        field_errors = validator.validate(form_data)
+        if field_errors:
+            return 400, {"error": "Please correct the highlighted fields.", "fields": field_errors}
+
+        # Fields of the submitted form version that still have a column (any field does in document storage)
+        layout = get_storage_layout(conn)
+        try:
+            hidden = {row[0] for row in conn.execute("SELECT name FROM hidden_columns")}
+        except sqlite3.OperationalError:
+            hidden = set()
+        row = {field.name: form_data[field.name] for field in validator.fields
+               if field.name in form_data and field.name not in hidden and (layout.document or layout.has_column(field.name))}
+
+        # Checked before the resume is copied; the unique index still settles a race with the dashboard
+        if conn.execute("SELECT 1 FROM applications WHERE email_normalized = ?", (normalize_email(form_data.get('email')),)).fetchone():
+            return 409, {"error": f"An application with the email '{form_data.get('email')}' already exists."}
+
+        # Columns the dashboard itself fills in; the timestamp is when the applicant submitted, not when this ran
+        row['submission_timestamp'] = datetime.fromtimestamp(submitted_at, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        if os.path.abspath(DASHBOARD_UPLOAD_FOLDER) != os.path.abspath(UPLOAD_FOLDER):
+            # Content-addressed, so the copy in the dashboard's storage keeps the same path (and is stored once)
+            with open(os.path.join(UPLOAD_FOLDER, resume_path), 'rb') as resume:
+                resume_path = store_upload(resume, DASHBOARD_UPLOAD_FOLDER, MAX_CONTENT_LENGTH)
+        row['resume_path'] = resume_path
+        row['form_version'] = form_version
+        if form_data.get('email'):
+            row['email_normalized'] = normalize_email(form_data['email'])  # Normalized email the dashboard joins statuses on
+
+        # Insert into database, in whichever storage layout the dashboard's applications table uses
+        application_id = layout.insert(conn, row)
+        conn.execute("INSERT INTO submission_receipts (idempotency_key, application_id) VALUES (?, ?)", (idempotency_key, application_id))
+        # The dashboard's rollups (which also back its filter facets) and pipeline analytics count this row, and its cached responses go stale
+        record_application_rollups(conn, row)
+        record_pipeline_entries(conn, [row])
+        bump_data_generation(conn)
         conn.commit()
         
-        return jsonify({"success": True, "message": "Application submitted successfully!"})
-        
+        return 200, {"success": True, "message": "Application submitted successfully!"}
+
+    except sqlite3.IntegrityError:
+        return 409, {"error": f"An application with the email '{form_data.get('email')}' already exists."}
     except Exception as e:
         print(f"Error saving to database: {e}")
         print(traceback.format_exc())
-        return jsonify({"error": "Failed to save application"}), 500
+        return 500, {"error": "Failed to save application"}
     finally:
         conn.close()
 
+@app.route('/api/health/db', methods=['GET'])
+def database_pool_health():
+    """Connection pool statistics of the dashboard database and the submission outbox"""
+    return jsonify({"pools": pool_stats()})
+
+@app.route('/api/health/outbox', methods=['GET'])
+def outbox_health():
+    """Submission outbox backlog and worker count"""
+    return jsonify(submission_outbox.snapshot())
+
+@app.route('/api/health/dashboard', methods=['GET'])
+def dashboard_health():
+    """Circuit breaker state and call latency of the dashboard backend, as seen from the form server"""
+    return jsonify({"dashboard_url": DASHBOARD_URL, **dashboard_client.breaker.snapshot()})
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files"""